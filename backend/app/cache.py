@@ -0,0 +1,133 @@
+"""
+HTTP caching of the trip summary routes.
+
+Responses are versioned by the ETL's ``load_ledger``: every load and full refresh of
+``trip_summary`` writes entries of it, each under a new ``version`` drawn from a sequence,
+so the ledger's size and latest version change whenever the data can have changed. Loads
+run without the ledger write no entries, so the version also takes the rows inserted,
+updated and deleted in the ``trip_summary`` tables from the statistics PostgreSQL keeps
+of them; these lag commits by a few seconds but cost no scan. The version is read at most
+once per ``TRIPS_DATA_VERSION_TTL`` seconds; a request whose ``If-None-Match`` carries the
+ETag of the current version is answered with a 304 without a query, and responses of hot
+keys are served from an LRU cache of their rendered JSON. Until the ETL has created the
+versioned ledger, responses are rendered without caching.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import asyncpg
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from database import connection
+
+# Seconds clients and proxies may reuse a response without revalidating it
+TRIPS_CACHE_MAX_AGE = int(os.environ.get("TRIPS_CACHE_MAX_AGE", 60))
+# Seconds the data version is trusted before it is read again
+TRIPS_DATA_VERSION_TTL = float(os.environ.get("TRIPS_DATA_VERSION_TTL", 30))
+# Rendered responses kept in memory
+TRIPS_CACHE_MAX_ENTRIES = int(os.environ.get("TRIPS_CACHE_MAX_ENTRIES", 1024))
+
+# The statistics name each table by its oid too, so recreating one changes the version
+DATA_VERSION_QUERY = r"""
+    SELECT
+        (SELECT count(*) FROM load_ledger),
+        (SELECT max(version) FROM load_ledger),
+        (SELECT string_agg(relid || ':' || (n_tup_ins + n_tup_upd + n_tup_del), ',' ORDER BY relid)
+         FROM pg_stat_user_tables WHERE relname LIKE 'trip\_summary%')
+"""
+
+
+class DataVersion:
+    """Version of the loaded data, re-read from the database once its TTL has passed."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._value = None
+        self._expires = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, request: Request) -> str | None:
+        """The current version, or None when the database has no versioned load ledger yet."""
+        if time.monotonic() < self._expires:
+            return self._value
+        # Concurrent requests of an expired version wait for one query instead of each running it
+        async with self._lock:
+            if time.monotonic() >= self._expires:
+                async with connection(request) as conn:
+                    try:
+                        entries, version, changes = await conn.fetchrow(DATA_VERSION_QUERY)
+                        self._value = f"{entries}:{version or ''}:{changes or ''}"
+                    except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+                        self._value = None
+                self._expires = time.monotonic() + self.ttl
+        return self._value
+
+
+class ResponseCache:
+    """Rendered response bodies by ETag, evicting the least recently used beyond ``max_entries``."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._bodies = OrderedDict()
+
+    def get(self, etag: str) -> bytes | None:
+        body = self._bodies.get(etag)
+        if body is not None:
+            self._bodies.move_to_end(etag)
+        return body
+
+    def put(self, etag: str, body: bytes):
+        self._bodies[etag] = body
+        self._bodies.move_to_end(etag)
+        while len(self._bodies) > self.max_entries:
+            self._bodies.popitem(last=False)
+
+
+data_version = DataVersion(TRIPS_DATA_VERSION_TTL)
+response_cache = ResponseCache(TRIPS_CACHE_MAX_ENTRIES)
+
+
+def make_etag(version: str, key: str) -> str:
+    """
+    Strong ETag of the response to ``key`` under a data version; the same version and key
+    always render the same bytes.
+    """
+    return f'"{hashlib.sha256(f"{version}|{key}".encode()).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header lists ``etag``, compared weakly as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+async def cached_response(request: Request, key: str, render: Callable[..., Awaitable[BaseModel]]) -> Response:
+    """
+    Response to ``key``, a string identifying the route and its validated parameters.
+
+    ``render`` is awaited with a pooled connection only when the client's copy is stale and
+    the body is not cached; exceptions it raises, such as a 404, are not cached. Without a
+    data version every request is rendered and answered without an ETag.
+    """
+    version = await data_version.get(request)
+    if version is None:
+        async with connection(request) as conn:
+            return Response(content=(await render(conn)).model_dump_json(), media_type="application/json")
+    etag = make_etag(version, key)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={TRIPS_CACHE_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = response_cache.get(etag)
+    if body is None:
+        async with connection(request) as conn:
+            body = (await render(conn)).model_dump_json().encode()
+        response_cache.put(etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, String, Date
+from sqlalchemy import BigInteger, Column, Computed, Float, Integer, String, Date, DateTime
 from sqlalchemy.orm import DeclarativeBase
 from datetime import datetime
 
@@ -17,12 +17,38 @@ class ActiveSession(Base):
 
 
 class TripSummaryORM(Base):
+    # Mirrors src/etl/utils/database_operation/schema.py, which creates the table and its
+    # monthly partitions; the primary key includes the partition key pickup_date
     __tablename__ = 'trip_summary'
 
-    uuid = Column(String, primary_key=True, unique=True, nullable=False)
-    pickup_date = Column(Date, nullable=False)
-    total_passenger_count = Column(Float, nullable=False)
-    total_distance = Column(Float, nullable=False)
-    total_fare = Column(Float, nullable=False)
-    avg_trip_distance = Column(Float, nullable=False)
-    avg_fare_amount = Column(Float, nullable=False)
+    uuid = Column(String, primary_key=True, nullable=False)
+    pickup_date = Column(Date, primary_key=True, nullable=False)
+    total_passenger_count = Column(BigInteger)
+    total_distance = Column(Float)
+    total_fare = Column(Float)
+    avg_trip_distance = Column(Float)
+    avg_fare_amount = Column(Float)
+    distance_count = Column(BigInteger)
+    fare_count = Column(BigInteger)
+
+
+class TripRollupColumns:
+    # Weekly and monthly rollups of trip_summary; the averages are generated from sums and counts
+    period_start = Column(Date, primary_key=True, nullable=False)
+    days = Column(Integer, nullable=False)
+    total_passenger_count = Column(BigInteger)
+    total_distance = Column(Float)
+    total_fare = Column(Float)
+    distance_count = Column(BigInteger)
+    fare_count = Column(BigInteger)
+    avg_trip_distance = Column(Float, Computed("total_distance / NULLIF(distance_count, 0)", persisted=True))
+    avg_fare_amount = Column(Float, Computed("total_fare / NULLIF(fare_count, 0)", persisted=True))
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class TripSummaryWeeklyORM(TripRollupColumns, Base):
+    __tablename__ = 'trip_summary_weekly'
+
+
+class TripSummaryMonthlyORM(TripRollupColumns, Base):
+    __tablename__ = 'trip_summary_monthly'
\ No newline at end of file
@@ -1,5 +1,6 @@
-from serialization.serialization import HealthCheck
-from fastapi import APIRouter, status
+from serialization.serialization import DatabasePoolStats, HealthCheck
+from fastapi import APIRouter, Request, status
+from database import pool_stats
 
 router = APIRouter()
 @router.get("/health", tags=["healthcheck"],
@@ -17,4 +18,17 @@ def get_health() -> HealthCheck:
     Returns:
         HealthCheck: Returns a JSON response with the health status
     """
-    return HealthCheck(status="OK")
\ No newline at end of file
+    return HealthCheck(status="OK")
+
+@router.get("/health/db", tags=["healthcheck"],
+    summary="Report database pool usage",
+    status_code=status.HTTP_200_OK,
+    response_model=DatabasePoolStats)
+def get_database_pool_stats(request: Request) -> DatabasePoolStats:
+    """
+    ## Report database pool usage
+    Open, idle and borrowed connections of the API's connection pool, and the number of
+    requests answered with 503 because no connection became free in time. Nothing is
+    queried, so polling it adds no load on the database.
+    """
+    return DatabasePoolStats(**pool_stats(request.app))
\ No newline at end of file
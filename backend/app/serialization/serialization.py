@@ -5,18 +5,42 @@ from typing import Optional
 class TripSummary(BaseModel):
     uuid: str
     pickup_date: date
-    total_passenger_count: float
-    total_distance: float
-    total_fare: float
-    avg_trip_distance: float
-    avg_fare_amount: float
+    total_passenger_count: int | None = None
+    total_distance: float | None = None
+    total_fare: float | None = None
+    avg_trip_distance: float | None = None
+    avg_fare_amount: float | None = None
+
+class TripRollup(BaseModel):
+    period_start: date
+    days: int
+    total_passenger_count: int | None = None
+    total_distance: float | None = None
+    total_fare: float | None = None
+    avg_trip_distance: float | None = None
+    avg_fare_amount: float | None = None
 
 class ResponseModel(BaseModel):
     status: str
     message: str
     data: TripSummary | None = None
 
+class RollupResponseModel(BaseModel):
+    status: str
+    message: str
+    data: list[TripRollup] = []
+
 class HealthCheck(BaseModel):
     """Response model to validate and return when performing a health check."""
 
     status: str = "OK"
+
+class DatabasePoolStats(BaseModel):
+    """Connection counts of the application's database pool."""
+
+    min_size: int
+    max_size: int
+    size: int
+    idle: int
+    in_use: int
+    acquire_timeouts: int
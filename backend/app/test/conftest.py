@@ -0,0 +1,23 @@
+import pytest
+from fastapi import FastAPI
+
+import cache
+from router.health import router as health_router
+from router.routes import router as trip_summary_router
+
+
+@pytest.fixture
+def app():
+    """Application with the health and trip routes, given a pool by each test instead of a lifespan."""
+    app = FastAPI()
+    app.include_router(trip_summary_router)
+    app.include_router(health_router)
+    app.state.db_acquire_timeouts = 0
+    return app
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    """Empty data version and response cache for each test."""
+    monkeypatch.setattr(cache, "data_version", cache.DataVersion(60))
+    monkeypatch.setattr(cache, "response_cache", cache.ResponseCache(16))
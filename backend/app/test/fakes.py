@@ -0,0 +1,49 @@
+import asyncio
+
+
+class FakeConnection:
+    """Connection answering each query with the result ``handler`` returns for it."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.queries = []
+
+    async def fetchrow(self, query, *args):
+        self.queries.append(query)
+        result = self.handler(query, *args)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    async def fetch(self, query, *args):
+        return await self.fetchrow(query, *args)
+
+
+class FakePool:
+    """Pool lending one connection, or timing out every acquire when ``exhausted``."""
+
+    def __init__(self, conn=None, exhausted=False, min_size=2, max_size=10, size=4, idle=1):
+        self.conn = conn
+        self.exhausted = exhausted
+        self.min_size, self.max_size, self.size, self.idle = min_size, max_size, size, idle
+        self.released = []
+
+    async def acquire(self, timeout=None):
+        if self.exhausted:
+            raise asyncio.TimeoutError
+        return self.conn
+
+    async def release(self, conn):
+        self.released.append(conn)
+
+    def get_min_size(self):
+        return self.min_size
+
+    def get_max_size(self):
+        return self.max_size
+
+    def get_size(self):
+        return self.size
+
+    def get_idle_size(self):
+        return self.idle
@@ -0,0 +1,147 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import asyncpg
+import pytest
+from fastapi.testclient import TestClient
+
+import cache
+from cache import DATA_VERSION_QUERY, DataVersion, ResponseCache, etag_matches
+from test.fakes import FakeConnection, FakePool
+
+TRIP = {
+    "uuid": "8f561754-f74b-55c6-8d6a-1ed737d1053c", "pickup_date": date(2023, 1, 1),
+    "total_passenger_count": 10, "total_distance": 25.0, "total_fare": 80.0,
+    "avg_trip_distance": 2.5, "avg_fare_amount": 8.0,
+}
+
+
+@pytest.fixture
+def versions():
+    """Data versions the fake database answers with, as mutable (entries, version, changes)."""
+    return [3, 7, "16384:42"]
+
+
+@pytest.fixture
+def conn(versions):
+    def handler(query, *args):
+        if query == DATA_VERSION_QUERY:
+            return tuple(versions) if versions else asyncpg.UndefinedTableError('relation "load_ledger" does not exist')
+        return TRIP
+    return FakeConnection(handler)
+
+
+@pytest.fixture
+def client(app, conn):
+    app.state.db_pool = FakePool(conn)
+    return TestClient(app)
+
+
+def trip_queries(conn):
+    return sum(query != DATA_VERSION_QUERY for query in conn.queries)
+
+
+@pytest.mark.parametrize("if_none_match, matches", [
+    (None, False),
+    ("", False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ("*", True),
+    (' "xyz" , W/"abc"', True),
+    ('"xyz", "abcd"', False),
+    ('"ABC"', False),
+])
+def test_etag_matches(if_none_match, matches):
+    """Test If-None-Match parsing: weak tags, the wildcard and lists."""
+    assert etag_matches(if_none_match, '"abc"') is matches
+
+
+def test_response_cache_evicts_least_recently_used():
+    """Test that reading an entry keeps it and the oldest unread one is evicted."""
+    responses = ResponseCache(max_entries=2)
+    responses.put("a", b"1")
+    responses.put("b", b"2")
+    assert responses.get("a") == b"1"
+
+    responses.put("c", b"3")
+
+    assert responses.get("b") is None
+    assert responses.get("a") == b"1"
+    assert responses.get("c") == b"3"
+
+
+def test_data_version_rereads_after_ttl(app, conn, versions, monkeypatch):
+    """Test that the version is served from memory within its TTL and queried again after it."""
+    now = [100.0]
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    app.state.db_pool = FakePool(conn)
+    request = SimpleNamespace(app=app)
+    data_version = DataVersion(ttl=30)
+
+    first = asyncio.run(data_version.get(request))
+    versions[2] = "16384:43"
+    now[0] += 29
+    assert asyncio.run(data_version.get(request)) == first
+    assert len(conn.queries) == 1
+
+    now[0] += 2
+    assert asyncio.run(data_version.get(request)) != first
+    assert len(conn.queries) == 2
+
+
+def test_data_version_without_ledger(app, conn, versions):
+    """Test that a database without the load ledger has no version."""
+    versions.clear()
+    app.state.db_pool = FakePool(conn)
+
+    assert asyncio.run(DataVersion(ttl=30).get(SimpleNamespace(app=app))) is None
+
+
+def test_response_without_ledger_is_not_cached(client, conn, versions):
+    """Test that without a data version every request is rendered and carries no ETag."""
+    versions.clear()
+
+    responses = [client.get("/trips", params={"pickup_date": "2023-01-01"}) for _ in range(2)]
+
+    assert [response.status_code for response in responses] == [200, 200]
+    assert all("etag" not in response.headers for response in responses)
+    assert trip_queries(conn) == 2
+
+
+def test_if_none_match_not_modified(client, conn):
+    """Test that a request carrying the current ETag, strong or weak, is answered 304 without rendering."""
+    response = client.get("/trips", params={"pickup_date": "2023-01-01"})
+    etag = response.headers["etag"]
+    assert response.status_code == 200
+    assert response.json()["data"]["uuid"] == TRIP["uuid"]
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}'):
+        response = client.get("/trips", params={"pickup_date": "2023-01-01"}, headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+    assert trip_queries(conn) == 1
+
+
+def test_cached_body_served_without_query(client, conn):
+    """Test that a repeated request without If-None-Match is served from the response cache."""
+    first = client.get("/trips", params={"pickup_date": "2023-01-01"})
+    second = client.get("/trips", params={"pickup_date": "2023-01-01"})
+
+    assert second.content == first.content
+    assert trip_queries(conn) == 1
+
+
+def test_new_version_changes_etag(client, conn, versions, monkeypatch):
+    """Test that a change of the trip_summary row counts alone invalidates cached responses."""
+    monkeypatch.setattr(cache, "data_version", DataVersion(ttl=0))
+    etag = client.get("/trips", params={"pickup_date": "2023-01-01"}).headers["etag"]
+    versions[2] = "16384:43"
+
+    response = client.get("/trips", params={"pickup_date": "2023-01-01"}, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert trip_queries(conn) == 2
@@ -0,0 +1,83 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from database import connection, pool_stats
+from test.fakes import FakeConnection, FakePool
+
+
+async def borrow(request):
+    async with connection(request) as conn:
+        return conn
+
+
+def test_connection_releases_borrowed_connection(app):
+    """Test that the borrowed connection goes back to the pool."""
+    conn = FakeConnection(lambda query: None)
+    app.state.db_pool = FakePool(conn)
+
+    assert asyncio.run(borrow(SimpleNamespace(app=app))) is conn
+    assert app.state.db_pool.released == [conn]
+
+
+def test_connection_releases_on_error(app):
+    """Test that a connection is released when the request fails while holding it."""
+    conn = FakeConnection(lambda query: None)
+    app.state.db_pool = FakePool(conn)
+
+    async def fail():
+        async with connection(SimpleNamespace(app=app)):
+            raise HTTPException(status_code=404)
+
+    with pytest.raises(HTTPException):
+        asyncio.run(fail())
+    assert app.state.db_pool.released == [conn]
+
+
+def test_connection_acquire_timeout(app):
+    """Test that an exhausted pool answers 503 and counts the timeout."""
+    app.state.db_pool = FakePool(exhausted=True)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(borrow(SimpleNamespace(app=app)))
+
+    assert error.value.status_code == 503
+    assert app.state.db_acquire_timeouts == 1
+    assert app.state.db_pool.released == []
+
+
+def test_route_acquire_timeout(app):
+    """Test that a route answers 503 when no connection becomes free, and the health endpoint reports it."""
+    app.state.db_pool = FakePool(exhausted=True)
+    client = TestClient(app)
+
+    response = client.get("/trips", params={"pickup_date": "2023-01-01"})
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "No database connection available"}
+    assert client.get("/health/db").json()["acquire_timeouts"] == 1
+
+
+def test_pool_stats(app):
+    """Test the pool sizes and derived counts."""
+    app.state.db_pool = FakePool(min_size=2, max_size=10, size=4, idle=1)
+    app.state.db_acquire_timeouts = 3
+
+    assert pool_stats(app) == {
+        "min_size": 2, "max_size": 10, "size": 4, "idle": 1, "in_use": 3, "acquire_timeouts": 3,
+    }
+
+
+def test_health_db_endpoint(app):
+    """Test that /health/db serves the pool stats without borrowing a connection."""
+    app.state.db_pool = FakePool(exhausted=True, min_size=1, max_size=5, size=5, idle=0)
+
+    response = TestClient(app).get("/health/db")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "min_size": 1, "max_size": 5, "size": 5, "idle": 0, "in_use": 5, "acquire_timeouts": 0,
+    }
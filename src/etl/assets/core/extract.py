@@ -1,5 +1,6 @@
-from dagster import asset, AssetExecutionContext
+from dagster import asset, AssetExecutionContext, Failure
 from src.etl.resources.ts_resources import ParquetDownloadResource
+from src.etl.partitions import monthly_partitions
 
 @asset
 def ensure_download_folder_exists(context:AssetExecutionContext, download_resource: ParquetDownloadResource):
@@ -13,13 +14,21 @@ def ensure_download_folder_exists(context:AssetExecutionContext, download_resour
     download_resource.ensure_download_folder_exists(context)
 
 
-@asset(deps=[ensure_download_folder_exists])
+@asset(deps=[ensure_download_folder_exists], partitions_def=monthly_partitions)
 def download_parquet_data(context:AssetExecutionContext, download_resource: ParquetDownloadResource):
     """
-    Downloads Parquet files using the ParquetDownloadResource.
+    Downloads the Parquet file of one monthly partition using the ParquetDownloadResource.
+    The run fails when a file could not be downloaded, so the partition can be re-run.
 
     Args:
         context: Dagster context for logging.
         download_resource (ParquetDownloadResource): Instance of the resource.
     """
-    download_resource.download_parquet_data(context)
+    summary = download_resource.download_parquet_data(context, context.partition_key)
+    metadata = summary.as_metadata()
+    context.add_output_metadata(metadata)
+    if summary.failed:
+        raise Failure(
+            description=f"{len(summary.failed)} files failed to download: {summary.failed}",
+            metadata=metadata,
+        )
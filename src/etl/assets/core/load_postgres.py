@@ -1,14 +1,47 @@
-from dagster import asset, AssetExecutionContext
+import pyarrow as pa
+from dagster import asset, AssetExecutionContext, Failure
 from src.etl.resources.load_resource import ParquetPostgresLoader
-import psycopg2
+from src.etl.partitions import monthly_partitions
+
+@asset(partitions_def=monthly_partitions)
+def load_data_to_database(context: AssetExecutionContext, load_resource: ParquetPostgresLoader, transform_parquet_files: pa.Table):
+    """
+    Loads the summary of one monthly partition into PostgreSQL using the ParquetPostgresLoader.
+    Every month of the partitions has trips, so an empty summary fails the run.
+
+    Args:
+        context: Dagster context for logging.
+        load_resource (ParquetPostgresLoader): Instance of the resource.
+        transform_parquet_files (pa.Table): Daily summary of the month, memory-mapped by the Arrow IPC IO manager.
+    """
+    if transform_parquet_files.num_rows == 0:
+        raise Failure(description=f"The summary of {context.partition_key} is empty; re-run its download and transform.")
+    result = load_resource.load_summary_table(context, transform_parquet_files, context.partition_key)
+    context.add_output_metadata({
+        "rows_loaded": result.rows,
+        "rows_inserted": result.inserted,
+        "rows_updated": result.updated,
+        "rows_unchanged": result.unchanged,
+        "skipped": result.skipped,
+        "seconds": round(result.seconds, 3),
+    })
+
 
 @asset(deps=["transform_parquet_files"])
-def load_data_to_database(context: AssetExecutionContext, load_resource: ParquetPostgresLoader):
+def refresh_trip_summary(context: AssetExecutionContext, refresh_load_resource: ParquetPostgresLoader):
     """
-    Ensures the staging folder exists using the ParquetTransformResource.
+    Rebuilds all of trip_summary from the daily summary files with a full refresh: the files are
+    copied into a shadow table that is swapped in once complete. Not partitioned; materialize it on
+    its own, not alongside partitions of load_data_to_database.
 
     Args:
         context: Dagster context for logging.
-        transform_resource (ParquetTransformResource): Instance of the resource.
+        refresh_load_resource (ParquetPostgresLoader): Instance of the resource, with full_refresh set.
     """
-    load_resource.load_parquet_files(context)
+    if not refresh_load_resource.full_refresh:
+        raise ValueError("refresh_load_resource must be configured with full_refresh=True")
+    results = refresh_load_resource.load_parquet_files(context)
+    context.add_output_metadata({
+        "files_loaded": len(results),
+        "rows_loaded": sum(result.rows for result in results),
+    })
@@ -1,8 +1,10 @@
-from dagster import asset, AssetExecutionContext
+import pyarrow as pa
+from dagster import asset, AssetExecutionContext, Failure
 from src.etl.resources.transform_resource import ParquetTransformResource
+from src.etl.partitions import monthly_partitions
 
 
-@asset(deps=["download_parquet_data"])
+@asset(deps=["ensure_download_folder_exists"])
 def ensure_staging_folder_exists(context: AssetExecutionContext, transform_resource: ParquetTransformResource):
     """
     Ensures the staging folder exists using the ParquetTransformResource.
@@ -14,13 +16,32 @@ def ensure_staging_folder_exists(context: AssetExecutionContext, transform_resou
     transform_resource.ensure_staging_folder_exists(context)
 
 
-@asset(deps=[ensure_staging_folder_exists])
-def transform_parquet_files(context: AssetExecutionContext, transform_resource: ParquetTransformResource):
+@asset(
+    deps=[ensure_staging_folder_exists, "download_parquet_data"],
+    partitions_def=monthly_partitions,
+    io_manager_key="arrow_io_manager",
+)
+def transform_parquet_files(context: AssetExecutionContext, transform_resource: ParquetTransformResource) -> pa.Table:
     """
-    Transforms multiple Parquet files using the ParquetTransformResource.
+    Transforms the Parquet file of one monthly partition using the ParquetTransformResource.
+
+    The Parquet summaries stay in the staging folder for the S3 upload; the daily summary of the
+    month is also returned as an Arrow table for the Arrow IPC IO manager to hand to the loader.
+    The run fails when a file could not be transformed.
 
     Args:
         context: Dagster context for logging.
         transform_resource (ParquetTransformResource): Instance of the resource.
     """
-    transform_resource.transform_parquet_files(context)
+    results = transform_resource.transform_parquet_files(context, context.partition_key)
+    failed = {result.file_path: result.error for result in results if result.error}
+    metadata = {
+        "files_transformed": sum(1 for result in results if not result.error and not result.skipped),
+        "files_skipped": sum(1 for result in results if result.skipped),
+        "files_failed": list(failed),
+        "summary_rows": sum(result.rows for result in results),
+    }
+    context.add_output_metadata(metadata)
+    if failed:
+        raise Failure(description=f"{len(failed)} files failed to transform: {failed}", metadata=metadata)
+    return transform_resource.read_summary(context.partition_key)
@@ -0,0 +1,105 @@
+"""
+Benchmarks the row-by-row and COPY load modes of ParquetPostgresLoader against a Postgres database.
+
+The benchmark recreates the schema in the target database, then times a first load
+(inserts), a second load of the same rows (unchanged, nothing is written) and a load with
+new fares (updates) for every mode and size, with the WAL each of them generates:
+
+    python -m src.etl.benchmarks.load_benchmark --dsn postgresql://postgres@localhost/bench --rows 10000 100000
+"""
+import argparse
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import psycopg2
+
+from src.etl.resources.load_resource import LOAD_MODES, ParquetPostgresLoader
+from src.etl.utils.database_operation.postgresql import UpsertCounts
+from src.etl.utils.database_operation.schema import ensure_month_partitions, migrate
+
+RESET_SCHEMA_SQL = """
+    DROP TABLE IF EXISTS trip_summary, trip_summary_quarantine, trip_summary_weekly, trip_summary_monthly, load_ledger, schema_migrations CASCADE;
+"""
+
+
+def reset_schema(conn, summary: pa.Table):
+    """Recreates the schema and the partitions of every month in ``summary``."""
+    with conn.cursor() as cur:
+        cur.execute(RESET_SCHEMA_SQL)
+    conn.commit()
+    migrate(conn)
+    ensure_month_partitions(conn, {(day.year, day.month) for day in pc.unique(summary["pickup_date"]).to_pylist()})
+
+
+def synthetic_summary(rows: int, seed: int = 0) -> pa.Table:
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2020-01-01")
+    return pa.table({
+        "uuid": pa.array([f"{i:032x}" for i in range(rows)]),
+        "pickup_date": pa.array(start + rng.integers(0, 5 * 365, rows).astype("timedelta64[D]"), pa.date32()),
+        "total_passenger_count": rng.integers(0, 100_000, rows),
+        "total_distance": rng.gamma(2.0, 1000.0, rows),
+        "total_fare": rng.gamma(2.0, 5000.0, rows),
+        "avg_trip_distance": rng.gamma(2.0, 2.0, rows),
+        "avg_fare_amount": rng.gamma(2.0, 8.0, rows),
+        "distance_count": rng.integers(1, 10_000, rows),
+        "fare_count": rng.integers(1, 10_000, rows),
+    })
+
+
+def load(loader: ParquetPostgresLoader, conn, summary: pa.Table) -> UpsertCounts:
+    if loader.load_mode == "copy":
+        counts = loader._copy_summary(conn, summary)
+    else:
+        counts = loader._upsert_summary(conn, summary.to_pandas())
+    conn.commit()
+    return counts
+
+
+def wal_position(conn) -> str:
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_current_wal_lsn()")
+        return cur.fetchone()[0]
+
+
+def wal_bytes_since(conn, position: str) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_current_wal_lsn() - %s::pg_lsn", (position,))
+        return int(cur.fetchone()[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dsn", required=True, help="libpq connection string of a scratch database")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        for rows in args.rows:
+            summary = synthetic_summary(rows)
+            for mode in LOAD_MODES:
+                loader = ParquetPostgresLoader(
+                    host="", port=0, dbname="", user="", password="", output_folder="", load_mode=mode,
+                )
+                reset_schema(conn, summary)
+                timings = {}
+                changed = summary.set_column(
+                    summary.schema.get_field_index("total_fare"), "total_fare", pc.add(summary["total_fare"], 1.0),
+                )
+                for step, table in (("insert", summary), ("unchanged", summary), ("update", changed)):
+                    position = wal_position(conn)
+                    start = time.perf_counter()
+                    counts = load(loader, conn, table)
+                    timings[f"{step}_seconds"] = round(time.perf_counter() - start, 3)
+                    timings[f"{step}_written"] = counts.written
+                    timings[f"{step}_wal_bytes"] = wal_bytes_since(conn, position)
+                print({"rows": rows, "mode": mode, **timings, "rows_per_second": round(rows / timings["insert_seconds"])})
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Benchmarks the raw-file read and the summary engines of the transform on synthetic monthly trip files.
+
+Each case runs in its own subprocess so that its peak RSS is measured in isolation; every engine
+is run once per file size:
+
+    python -m src.etl.benchmarks.transform_benchmark --rows 1000000 3000000
+
+Cases with a setup step (``SETUPS``) only time what runs after it: ``summary_keys`` times the
+keys of every grain's summary of the file, not the summaries themselves.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.etl.resources.transform_resource import (
+    SUMMARY_ENGINES,
+    TransformConfig,
+    read_pickup_month,
+    summarize_with_arrow,
+    summary_keys,
+)
+from src.etl.setting.setting import ROLLUPS
+
+# Column layout of the published yellow taxi files
+RAW_COLUMNS = {
+    "VendorID": pa.int32(),
+    "tpep_pickup_datetime": pa.timestamp("us"),
+    "tpep_dropoff_datetime": pa.timestamp("us"),
+    "passenger_count": pa.int64(),
+    "trip_distance": pa.float64(),
+    "RatecodeID": pa.int64(),
+    "store_and_fwd_flag": pa.string(),
+    "PULocationID": pa.int32(),
+    "DOLocationID": pa.int32(),
+    "payment_type": pa.int64(),
+    "fare_amount": pa.float64(),
+    "extra": pa.float64(),
+    "mta_tax": pa.float64(),
+    "tip_amount": pa.float64(),
+    "tolls_amount": pa.float64(),
+    "improvement_surcharge": pa.float64(),
+    "total_amount": pa.float64(),
+    "congestion_surcharge": pa.float64(),
+    "Airport_fee": pa.float64(),
+}
+
+
+def write_synthetic_file(path: str, rows: int, year: int = 2023, month: int = 1, seed: int = 0):
+    """Write ``rows`` random trips, sorted by pickup time, with ~1% of them outside the file's month."""
+    rng = np.random.default_rng(seed)
+    start = np.datetime64(f"{year}-{month:02d}-01T00:00:00", "us")
+    month_us = 31 * 24 * 3600 * 1_000_000
+    pickups = start + rng.integers(0, month_us, rows).astype("timedelta64[us]")
+    outliers = rng.random(rows) < 0.01
+    pickups[outliers] -= np.timedelta64(400, "D")
+    pickups.sort()
+    data = {}
+    for name, dtype in RAW_COLUMNS.items():
+        if name == "tpep_pickup_datetime":
+            data[name] = pickups
+        elif name == "tpep_dropoff_datetime":
+            data[name] = pickups + rng.integers(60, 3600, rows).astype("timedelta64[s]")
+        elif pa.types.is_floating(dtype):
+            data[name] = rng.gamma(2.0, 5.0, rows)
+        elif pa.types.is_string(dtype):
+            data[name] = np.where(rng.random(rows) < 0.01, "Y", "N")
+        else:
+            data[name] = rng.integers(1, 6, rows)
+    table = pa.Table.from_pandas(pd.DataFrame(data), preserve_index=False).cast(pa.schema(RAW_COLUMNS))
+    pq.write_table(table, path, row_group_size=128 * 1024)
+
+
+def read_full_then_filter(file_path: str) -> pd.DataFrame:
+    """The original read: every column through pandas, month filter applied afterwards."""
+    df = pq.read_table(file_path).to_pandas()
+    df["tpep_pickup_datetime"] = pd.to_datetime(df["tpep_pickup_datetime"])
+    return df[df["tpep_pickup_datetime"].dt.month == int(file_path[-10:-8])]
+
+
+def read_projected(file_path: str) -> pd.DataFrame:
+    return read_pickup_month(file_path).to_pandas()
+
+
+def rollups_single_scan(file_path: str) -> pa.Table:
+    """Every rollup grain from one read of the file."""
+    summaries = summarize_with_arrow(file_path, TransformConfig(engine="pyarrow", rollups=tuple(ROLLUPS)))
+    return summaries["daily"]
+
+
+def rollups_per_grain(file_path: str) -> pa.Table:
+    """Every rollup grain with its own read of the file, as separate jobs per grain would do."""
+    for grain in ROLLUPS:
+        summarize_with_arrow(file_path, TransformConfig(engine="pyarrow", rollups=(grain,)))
+    return summarize_with_arrow(file_path, TransformConfig(engine="pyarrow"))["daily"]
+
+
+def summarize_all_grains(file_path: str) -> dict[str, pa.Table]:
+    return summarize_with_arrow(file_path, TransformConfig(engine="pyarrow", rollups=tuple(ROLLUPS)))
+
+
+def key_all_grains(summaries: dict[str, pa.Table]) -> pa.Array:
+    """The uuid of every summary row, as ``summarize_file`` adds them before writing."""
+    return pa.concat_arrays([summary_keys(summary, "yellow_tripdata", grain) for grain, summary in summaries.items()])
+
+
+CASES = {
+    "full_read": read_full_then_filter,
+    "projected_pushdown": read_projected,
+    **{
+        f"summary_{engine}": (
+            lambda file_path, engine=engine: SUMMARY_ENGINES[engine](file_path, TransformConfig(engine=engine))["daily"]
+        )
+        for engine in SUMMARY_ENGINES
+    },
+    "rollups_single_scan": rollups_single_scan,
+    "rollups_per_grain": rollups_per_grain,
+    "summary_keys": key_all_grains,
+}
+
+# Untimed steps whose result is passed to the case instead of the file path
+SETUPS = {
+    "summary_keys": summarize_all_grains,
+}
+
+
+def run_case(case: str, file_path: str) -> dict:
+    argument = SETUPS[case](file_path) if case in SETUPS else file_path
+    start = time.perf_counter()
+    rows = len(CASES[case](argument))
+    return {
+        "case": case,
+        "rows": rows,
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 3_000_000])
+    parser.add_argument("--case", choices=sorted(CASES), help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    parser.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        write_synthetic_file(args.file, args.rows[0])
+        return
+    if args.case:
+        print(json.dumps(run_case(args.case, args.file)))
+        return
+
+    # ru_maxrss survives fork+exec, so the parent stays small and every step is its own process
+    for rows in args.rows:
+        command = [sys.executable, "-m", "src.etl.benchmarks.transform_benchmark", "--rows", str(rows)]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "yellow_tripdata_2023-01.parquet")
+            subprocess.run(command + ["--generate", "--file", file_path], check=True)
+            print(f"{rows} rows, {os.path.getsize(file_path) / 1024 / 1024:.1f} MB on disk")
+            for case in CASES:
+                output = subprocess.run(
+                    command + ["--case", case, "--file", file_path], check=True, capture_output=True, text=True,
+                ).stdout
+                print(output.strip())
+
+
+if __name__ == "__main__":
+    main()
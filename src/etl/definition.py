@@ -1,10 +1,11 @@
 from dagster import Definitions, load_assets_from_package_module
-from src.etl.setting.setting import CORE, BASE_URL, YEARS_TO_DOWNLOAD, MONTHS_TO_DOWNLOAD, DOWNLOAD_FOLDER, STAGING_FOLDER, MAX_WORKERS
+from src.etl.setting.setting import CORE, BASE_URL, YEARS_TO_DOWNLOAD, MONTHS_TO_DOWNLOAD, DOWNLOAD_FOLDER, STAGING_FOLDER, MAX_WORKERS, MAX_CONCURRENT_DOWNLOADS, DOWNLOAD_MAX_RETRIES, ROLLUPS, ARROW_IO_FOLDER
 from src.etl.assets import core
 from src.etl.resources.ts_resources import ParquetDownloadResource
 from src.etl.resources.transform_resource import ParquetTransformResource
 from src.etl.resources.upload_resource import ParquetUploadResource
 from src.etl.resources.load_resource import ParquetPostgresLoader
+from src.etl.resources.io_manager import ArrowIPCIOManager
 import os, sys, psycopg2
 
 core_assets = load_assets_from_package_module(core, group_name=CORE)
@@ -15,12 +16,16 @@ RESOURCES_LOCAL = {
         base_url=BASE_URL,
         years=YEARS_TO_DOWNLOAD,
         months=MONTHS_TO_DOWNLOAD,
-        download_folder=DOWNLOAD_FOLDER
+        download_folder=DOWNLOAD_FOLDER,
+        concurrent=True,
+        max_concurrency=MAX_CONCURRENT_DOWNLOADS,
+        max_retries=DOWNLOAD_MAX_RETRIES
     ),
     "transform_resource" : ParquetTransformResource(
     source_folder=DOWNLOAD_FOLDER,
     output_folder=STAGING_FOLDER,
-    max_workers=MAX_WORKERS
+    max_workers=MAX_WORKERS,
+    rollups=ROLLUPS
     ),
     "upload_resource": ParquetUploadResource(
         aws_access_key=os.environ.get("AWS_ACCESS_KEY", "test"),
@@ -29,7 +34,8 @@ RESOURCES_LOCAL = {
         source_folder=STAGING_FOLDER,
         bucket_name=os.environ.get("S3_BUCKET", "test_bucket"),
         s3_folder="firmware/test/",
-        batch_size=10
+        batch_size=10,
+        endpoint_url=os.environ.get("S3_ENDPOINT_URL")
     ),
     "load_resource": ParquetPostgresLoader(
         host="172.18.0.2",
@@ -37,8 +43,25 @@ RESOURCES_LOCAL = {
         dbname="trip_summary",
         user="postgres",
         password="postgres",
-        output_folder=STAGING_FOLDER
-    )
+        output_folder=STAGING_FOLDER,
+        load_mode="copy",
+        use_ledger=True,
+        maintain_rollups=True
+    ),
+    # Same database as load_resource, for the refresh_trip_summary asset
+    "refresh_load_resource": ParquetPostgresLoader(
+        host="172.18.0.2",
+        port="5432",
+        dbname="trip_summary",
+        user="postgres",
+        password="postgres",
+        output_folder=STAGING_FOLDER,
+        load_mode="copy",
+        use_ledger=True,
+        maintain_rollups=True,
+        full_refresh=True
+    ),
+    "arrow_io_manager": ArrowIPCIOManager(base_dir=ARROW_IO_FOLDER)
 }
 resources_by_deployment_name = {
     # "prod": RESOURCES_PROD,
@@ -0,0 +1,78 @@
+import glob
+import os
+import re
+from dagster import StaticPartitionsDefinition
+from src.etl.setting.setting import YEARS_TO_DOWNLOAD, MONTHS_TO_DOWNLOAD
+
+# One partition per monthly trip file, e.g. "2023-01"
+monthly_partitions = StaticPartitionsDefinition(
+    [f"{year}-{month:02d}" for year in YEARS_TO_DOWNLOAD for month in MONTHS_TO_DOWNLOAD]
+)
+
+
+def partition_year_month(partition_key: str) -> tuple[int, int]:
+    """
+    Splits a monthly partition key into its year and month.
+
+    Args:
+        partition_key: Partition key in ``YYYY-MM`` format.
+
+    Returns:
+        tuple[int, int]: The year and month of the partition.
+    """
+    year, month = partition_key.split("-")
+    return int(year), int(month)
+
+
+def partition_file_suffix(partition_key: str | None) -> str:
+    """
+    File name suffix of the raw files of a partition.
+
+    ``yellow_tripdata_2023-01.parquet`` ends in ``_2023-01.parquet``; without a partition key
+    every Parquet file matches.
+    """
+    if partition_key is None:
+        return ".parquet"
+    return f"_{partition_key}.parquet"
+
+
+def summary_partition_dir(grain: str, year: int, month: int) -> str:
+    """
+    Hive-style folder of one month of a summary dataset, relative to the staging folder.
+
+    Returns:
+        str: e.g. ``daily/year=2023/month=01``.
+    """
+    return os.path.join(grain, f"year={year}", f"month={month:02d}")
+
+
+def summary_file_month(file_path: str) -> tuple[int, int] | None:
+    """
+    Year and month of a file in a ``year=/month=`` summary folder.
+
+    Returns:
+        tuple[int, int] | None: The year and month, or None outside of a partition folder.
+    """
+    match = re.search(r"year=(\d{4})[/\\]month=(\d{2})", file_path)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+def summary_dataset_files(output_folder: str, grain: str = "*", partition_key: str | None = None) -> list[str]:
+    """
+    Compacted summary files in ``output_folder``, optionally of one grain and one monthly partition.
+
+    Args:
+        output_folder: The transform's staging folder.
+        grain: Summary grain such as ``daily``; ``*`` matches every grain.
+        partition_key: Partition key in ``YYYY-MM`` format; ``None`` matches every month.
+
+    Returns:
+        list[str]: Sorted paths of the matching Parquet files.
+    """
+    if partition_key is None:
+        partition_dir = os.path.join(grain, "year=*", "month=*")
+    else:
+        partition_dir = summary_partition_dir(grain, *partition_year_month(partition_key))
+    return sorted(glob.glob(os.path.join(output_folder, partition_dir, "*.parquet")))
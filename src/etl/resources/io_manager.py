@@ -0,0 +1,37 @@
+import os
+import pyarrow as pa
+import pyarrow.feather as feather
+from dagster import ConfigurableIOManager, InputContext, OutputContext
+
+
+class ArrowIPCIOManager(ConfigurableIOManager):
+    """
+    Hands Arrow tables between assets as uncompressed Arrow IPC (Feather V2) files.
+
+    Every output is written once to ``<base_dir>/<asset key>/<partition>.arrow``; downstream
+    assets memory-map that file, so their input tables point straight at the page cache instead
+    of being decoded from Parquet again.
+    """
+    base_dir: str
+
+    def _path(self, context: InputContext | OutputContext) -> str:
+        if context.has_asset_partitions:
+            file_name = context.asset_partition_key
+        else:
+            file_name = "__all__"
+        return os.path.join(self.base_dir, *context.asset_key.path, f"{file_name}.arrow")
+
+    def handle_output(self, context: OutputContext, obj: pa.Table):
+        """Writes ``obj`` atomically; compression stays off so readers can map it zero-copy."""
+        path = self._path(context)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        feather.write_feather(obj, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+        context.add_output_metadata({"path": path, "rows": obj.num_rows, "bytes": os.path.getsize(path)})
+
+    def load_input(self, context: InputContext) -> pa.Table:
+        """Memory-maps the upstream table; its buffers stay valid as long as the table is referenced."""
+        path = self._path(context)
+        with pa.memory_map(path) as source:
+            return pa.ipc.open_file(source).read_all()
@@ -1,10 +1,109 @@
 # load_resource.py
+import hashlib
 import os
-import glob
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import time
 import psycopg2
-from dagster import ConfigurableResource, AssetExecutionContext
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from psycopg2.pool import ThreadedConnectionPool
+from dagster import ConfigurableResource, AssetExecutionContext, InitResourceContext
+from pydantic import PrivateAttr
+from src.etl.partitions import summary_dataset_files, summary_file_month
+from src.etl.utils.database_operation.postgresql import (
+    LOAD_COLUMNS,
+    OPTIONAL_LOAD_COLUMNS,
+    UpsertCounts,
+    copy_rows,
+    copy_upsert,
+    upsert_rows,
+    with_optional_columns,
+)
+from src.etl.utils.database_operation.schema import (
+    REFRESH_LOCK_ID,
+    ROLLUP_LOCK_ID,
+    ROLLUP_TABLES,
+    SHADOW_TABLE,
+    create_shadow_table,
+    ensure_month_partitions,
+    index_shadow_table,
+    migrate,
+    rollup_period_start,
+    swap_shadow_table,
+)
+
+LOAD_MODES = ("rows", "copy")
+
+# Recomputes the touched periods of a rollup from the daily rows, which upserts may have replaced.
+# Rows loaded from summaries without counts are left out: their averages cannot be merged exactly.
+REFRESH_ROLLUP_QUERY = """
+    INSERT INTO {table}
+        (period_start, days, total_passenger_count, total_distance, total_fare, distance_count, fare_count)
+    SELECT
+        date_trunc('{unit}', pickup_date)::date,
+        count(DISTINCT pickup_date),
+        sum(total_passenger_count),
+        sum(total_distance),
+        sum(total_fare),
+        sum(distance_count),
+        sum(fare_count)
+    FROM trip_summary
+    WHERE pickup_date >= %(first)s
+        AND pickup_date < (%(last)s::date + INTERVAL '1 {unit}')::date
+        AND date_trunc('{unit}', pickup_date)::date = ANY(%(periods)s)
+        AND distance_count IS NOT NULL
+        AND fare_count IS NOT NULL
+    GROUP BY 1
+    ON CONFLICT (period_start) DO UPDATE SET
+        days = EXCLUDED.days,
+        total_passenger_count = EXCLUDED.total_passenger_count,
+        total_distance = EXCLUDED.total_distance,
+        total_fare = EXCLUDED.total_fare,
+        distance_count = EXCLUDED.distance_count,
+        fare_count = EXCLUDED.fare_count,
+        refreshed_at = now()
+"""
+
+# Every write of an entry draws a new version, which the backend's response cache keys on
+RECORD_LOAD_QUERY = """
+    INSERT INTO load_ledger (file_path, sha256, row_count)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (file_path) DO UPDATE SET
+        sha256 = EXCLUDED.sha256,
+        row_count = EXCLUDED.row_count,
+        loaded_at = now(),
+        version = DEFAULT
+"""
+
+
+def file_sha256(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hex SHA-256 of the content of ``file_path``."""
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+@dataclass
+class LoadResult:
+    """Outcome of loading one summary file; ``file_path`` is None for in-memory tables.
+
+    ``skipped`` is set when the load ledger already holds the file with the same content;
+    ``inserted``, ``updated`` and ``unchanged`` split up the ``rows`` that were upserted.
+    """
+    file_path: str | None
+    rows: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+    skipped: bool = False
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
 
 class ParquetPostgresLoader(ConfigurableResource):
     host: str
@@ -13,89 +112,424 @@ class ParquetPostgresLoader(ConfigurableResource):
     user: str
     password: str
     output_folder: str
+    load_mode: str = "rows"
+    pool_size: int = 4
+    use_ledger: bool = False
+    maintain_rollups: bool = False
+    full_refresh: bool = False
+    refresh_min_ratio: float = 0.5
+    swap_lock_timeout_ms: int = 5000
+
+    _pool: ThreadedConnectionPool | None = PrivateAttr(default=None)
+
+    def setup_for_execution(self, context: InitResourceContext) -> None:
+        """Brings the database schema up to date before the run loads anything."""
+        with self.pooled_connection() as conn:
+            applied = migrate(conn)
+        if applied:
+            context.log.info(f"Applied schema migrations {applied}")
+
+    def teardown_after_execution(self, context: InitResourceContext) -> None:
+        """Closes the connections of the resource's pool."""
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
 
     def connect(self, context: AssetExecutionContext):
-        """Establish and return the PostgreSQL connection, storing it in the instance."""
+        """Establish and return a new PostgreSQL connection; the caller closes it."""
         try:
-            self.conn = psycopg2.connect(
-                host=self.host,
-                port=self.port,
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password
-            )
-            context.log.info("Connection success: ", self.user)
-            return self.conn
+            conn = psycopg2.connect(**self._connection_kwargs())
+            context.log.info(f"Connection success: {self.user}")
+            return conn
         except Exception as e:
             context.log.error("Connection error")
 
-    def load_parquet_files(self, context: AssetExecutionContext):
+    def _connection_kwargs(self) -> dict:
+        return {
+            "host": self.host,
+            "port": self.port,
+            "dbname": self.dbname,
+            "user": self.user,
+            "password": self.password,
+        }
+
+    @contextmanager
+    def pooled_connection(self):
         """
-        Reads all Parquet files from the specified output_folder directory and loads
-        their data into the PostgreSQL table 'trip_summary'.
+        A connection of the pool the resource keeps for the run, returned to it when the block
+        exits; an open transaction is rolled back. The pool is opened on first use, keeps one
+        connection open for reuse and is closed by ``teardown_after_execution``, so the
+        migrations and the partitions loaded by the same process share a connection.
         """
-        conn = psycopg2.connect(
-            host=self.host,
-                port=self.port,
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password 
-        )
-        parquet_files = glob.glob(os.path.join(self.output_folder, "*.parquet"))
+        if self._pool is None:
+            self._pool = ThreadedConnectionPool(1, self.pool_size, **self._connection_kwargs())
+        conn = self._pool.getconn()
+        try:
+            yield conn
+        finally:
+            self._pool.putconn(conn)
+
+    @contextmanager
+    def connection_pool(self, size: int | None = None):
+        """
+        A thread-safe pool of ``size`` connections (``pool_size`` by default), closed when the
+        block exits. psycopg2 closes returned connections beyond ``minconn``, so the pool keeps
+        all of them open for reuse.
+        """
+        size = size or self.pool_size
+        connection_pool = ThreadedConnectionPool(size, size, **self._connection_kwargs())
+        try:
+            yield connection_pool
+        finally:
+            connection_pool.closeall()
+
+    def load_parquet_files(self, context: AssetExecutionContext, partition_key: str | None = None) -> list[LoadResult]:
+        """
+        Reads the daily summary dataset in output_folder and loads its data into the
+        PostgreSQL table 'trip_summary'. With a ``partition_key`` only the
+        ``year=/month=`` folder of that month is read.
+
+        Up to ``pool_size`` files are loaded concurrently, each on a pooled connection and in
+        its own transaction, so a failing file is rolled back without affecting the others.
+        ``load_mode`` "rows" upserts row by row; "copy" streams each file into a staging
+        table with ``COPY`` and merges it with one ``INSERT ... SELECT ... ON CONFLICT``.
+
+        The monthly partitions of ``trip_summary`` the files belong to are created first, in
+        their own transaction.
+
+        With ``use_ledger`` the ``load_ledger`` table is read once up front and files whose
+        SHA-256 is already recorded under their path are skipped without being read. Every
+        loaded file is recorded in the same transaction as its rows, so a crash never leaves
+        rows without their ledger entry or the other way round.
+
+        With ``maintain_rollups`` the weekly and monthly periods a file touches are recomputed
+        in its transaction as well.
+
+        With ``full_refresh`` the whole dataset replaces the table instead, see
+        ``_refresh_from_files``; it cannot be combined with a ``partition_key``.
+
+        Returns:
+            list[LoadResult]: One result per file, in file order.
+        """
+        self._check_load_mode()
+        if self.full_refresh and partition_key:
+            raise ValueError("A full refresh replaces all of 'trip_summary' and cannot load a single partition")
+        parquet_files = summary_dataset_files(self.output_folder, "daily", partition_key)
         if not parquet_files:
             context.log.info(f"No Parquet files found in directory: {self.output_folder}")
-            return
-        required_columns = [
-            "uuid",
-            "pickup_date",
-            "total_passenger_count",
-            "total_distance",
-            "total_fare",
-            "avg_trip_distance",
-            "avg_fare_amount",
-        ]
-        for file_path in parquet_files:
-            context.log.info(f"Processing file: {file_path}")
+            return []
+        if self.full_refresh:
+            return self._refresh_from_files(context, parquet_files)
+        workers = min(self.pool_size, len(parquet_files))
+        with self.connection_pool(workers) as connection_pool:
+            loaded = {}
+            conn = connection_pool.getconn()
             try:
-                df = pd.read_parquet(file_path)
-            except Exception as e:
-                context.log.info(f"Error reading {file_path}: {e}")
-                continue
-            missing_cols = [col for col in required_columns if col not in df.columns]
-            if missing_cols:
-                context.log.info(f"File {file_path} is missing required columns: {missing_cols}. Skipping.")
-                continue
-            if pd.api.types.is_datetime64_any_dtype(df["pickup_date"]):
-                df["pickup_date"] = df["pickup_date"].dt.date
+                months = {summary_file_month(file_path) for file_path in parquet_files} - {None}
+                self._ensure_partitions(context, conn, months)
+                if self.use_ledger:
+                    loaded = self.read_load_ledger(conn)
+            finally:
+                connection_pool.putconn(conn)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(
+                    lambda file_path: self._load_file(context, connection_pool, file_path, loaded), parquet_files,
+                ))
+        failed = [result for result in results if result.error]
+        skipped = [result for result in results if result.skipped]
+        if skipped:
+            context.log.info(f"Skipped {len(skipped)} files already recorded in the load ledger.")
+        context.log.info(
+            f"Loaded {sum(result.rows for result in results)} rows from "
+            f"{len(results) - len(failed) - len(skipped)}/{len(results)} files."
+        )
+        context.log.info(
+            f"{sum(result.inserted for result in results)} rows inserted, "
+            f"{sum(result.updated for result in results)} updated, "
+            f"{sum(result.unchanged for result in results)} unchanged."
+        )
+        return results
+
+    def _refresh_from_files(self, context: AssetExecutionContext, parquet_files: list[str]) -> list[LoadResult]:
+        """
+        Replaces the content of 'trip_summary' with the rows of ``parquet_files`` without
+        writing to the live table while they load.
+
+        The files are streamed with ``COPY`` into ``trip_summary_shadow``, up to ``pool_size``
+        at a time. Its primary key and indexes are then built in one pass and the table is
+        validated: it must hold exactly the rows read, and at least ``refresh_min_ratio`` times
+        the rows of the live table, so a half-synced output folder cannot wipe it. Only then
+        is it swapped in by ``swap_shadow_table`` in one short transaction that also replaces
+        the load ledger with the loaded files. ``GET /trips`` keeps reading the old rows until
+        that commit, and any failure before it leaves the live table untouched.
+
+        Rows written by incremental loads while the shadow table fills are lost with the old
+        table, so refreshes should not run alongside them; two refreshes never run at once.
+
+        Raises:
+            RuntimeError: When a file fails to load or another refresh is running.
+            ValueError: When the shadow table fails validation.
+        """
+        start = time.perf_counter()
+        workers = min(self.pool_size, len(parquet_files))
+        months = {summary_file_month(file_path) for file_path in parquet_files} - {None}
+        # One more connection than workers: it holds the refresh lock and swaps the tables
+        with self.connection_pool(workers + 1) as connection_pool:
+            conn = connection_pool.getconn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", (REFRESH_LOCK_ID,))
+                    locked = cur.fetchone()[0]
+                conn.commit()
+                if not locked:
+                    raise RuntimeError("Another full refresh of 'trip_summary' is running")
+                try:
+                    create_shadow_table(conn, months)
+                    with ThreadPoolExecutor(max_workers=workers) as executor:
+                        loads = list(executor.map(
+                            lambda file_path: self._copy_file_to_shadow(context, connection_pool, file_path), parquet_files,
+                        ))
+                    results = [result for result, _ in loads]
+                    failed = [result.file_path for result in results if result.error]
+                    if failed:
+                        raise RuntimeError(f"Full refresh aborted, 'trip_summary' was not changed. Failed files: {failed}")
+                    index_shadow_table(conn)
+                    self._validate_shadow(conn, sum(result.rows for result in results))
+                    swap_shadow_table(conn, self.swap_lock_timeout_ms)
+                    if self.use_ledger:
+                        with conn.cursor() as cur:
+                            cur.execute("DELETE FROM load_ledger")
+                        self._record_loads(conn, [entry for _, entry in loads])
+                    conn.commit()
+                    if self.maintain_rollups:
+                        self._rebuild_rollups(conn)
+                        conn.commit()
+                finally:
+                    conn.rollback()
+                    with conn.cursor() as cur:
+                        cur.execute(f"DROP TABLE IF EXISTS {SHADOW_TABLE}")
+                        cur.execute("SELECT pg_advisory_unlock(%s)", (REFRESH_LOCK_ID,))
+                    conn.commit()
+            finally:
+                connection_pool.putconn(conn)
+        context.log.info(
+            f"Replaced 'trip_summary' with {sum(result.rows for result in results)} rows from "
+            f"{len(results)} files in {time.perf_counter() - start:.1f}s."
+        )
+        return results
+
+    def _copy_file_to_shadow(self, context: AssetExecutionContext, connection_pool, file_path: str) -> tuple[LoadResult, tuple[str, str, int] | None]:
+        """
+        Streams one summary file into the shadow table on a pooled connection and commits.
+
+        Returns:
+            tuple[LoadResult, tuple[str, str, int] | None]: The result and, with ``use_ledger``,
+            the file's load ledger entry.
+        """
+        start = time.perf_counter()
+        context.log.info(f"Processing file: {file_path}")
+        try:
+            df = pd.read_parquet(file_path)
+        except Exception as e:
+            context.log.info(f"Error reading {file_path}: {e}")
+            return LoadResult(file_path=file_path, error=f"{type(e).__name__}: {e}"), None
+        missing_cols = [col for col in LOAD_COLUMNS if col not in df.columns and col not in OPTIONAL_LOAD_COLUMNS]
+        if missing_cols:
+            context.log.info(f"File {file_path} is missing required columns: {missing_cols}.")
+            return LoadResult(file_path=file_path, error=f"Missing columns: {missing_cols}"), None
+        ledger_entry = (self._ledger_path(file_path), file_sha256(file_path), len(df)) if self.use_ledger else None
+        conn = connection_pool.getconn()
+        try:
+            copy_rows(conn, SHADOW_TABLE, with_optional_columns(pa.Table.from_pandas(df, preserve_index=False)))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            context.log.error(f"Failed to load {file_path}: {e}")
+            return LoadResult(file_path=file_path, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}"), None
+        finally:
+            connection_pool.putconn(conn)
+        return LoadResult(file_path=file_path, rows=len(df), seconds=time.perf_counter() - start, inserted=len(df)), ledger_entry
+
+    def _validate_shadow(self, conn, expected_rows: int):
+        """Raises ValueError unless the shadow table may replace 'trip_summary'."""
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT (SELECT count(*) FROM {SHADOW_TABLE}), (SELECT count(*) FROM trip_summary)")
+            shadow_rows, live_rows = cur.fetchone()
+        conn.commit()
+        if shadow_rows != expected_rows:
+            raise ValueError(f"The shadow table holds {shadow_rows} rows, {expected_rows} were loaded")
+        if shadow_rows < self.refresh_min_ratio * live_rows:
+            raise ValueError(
+                f"The shadow table holds {shadow_rows} rows, less than {self.refresh_min_ratio:.0%} "
+                f"of the {live_rows} rows of 'trip_summary'"
+            )
+
+    def _ensure_partitions(self, context: AssetExecutionContext, conn, months):
+        created = ensure_month_partitions(conn, months)
+        if created:
+            context.log.info(f"Created trip_summary partitions: {created}")
+
+    def read_load_ledger(self, conn) -> dict[str, str]:
+        """Returns the SHA-256 recorded in ``load_ledger`` per file path, relative to ``output_folder``."""
+        with conn.cursor() as cur:
+            cur.execute("SELECT file_path, sha256 FROM load_ledger")
+            loaded = dict(cur.fetchall())
+        conn.commit()
+        return loaded
+
+    def _ledger_path(self, file_path: str) -> str:
+        return os.path.relpath(file_path, self.output_folder)
+
+    def _load_file(self, context: AssetExecutionContext, connection_pool, file_path: str, loaded: dict[str, str]) -> LoadResult:
+        """
+        Loads one summary file on a pooled connection, rolling back its transaction on failure.
+        ``loaded`` is the content of the load ledger; it is empty without ``use_ledger``.
+        """
+        start = time.perf_counter()
+        context.log.info(f"Processing file: {file_path}")
+        ledger_entries = []
+        try:
+            if self.use_ledger:
+                digest = file_sha256(file_path)
+                if loaded.get(self._ledger_path(file_path)) == digest:
+                    context.log.info(f"File {file_path} is unchanged since its last load. Skipping.")
+                    return LoadResult(file_path=file_path, skipped=True)
+            df = pd.read_parquet(file_path)
+        except Exception as e:
+            context.log.info(f"Error reading {file_path}: {e}")
+            return LoadResult(file_path=file_path, error=f"{type(e).__name__}: {e}")
+        missing_cols = [col for col in LOAD_COLUMNS if col not in df.columns and col not in OPTIONAL_LOAD_COLUMNS]
+        if missing_cols:
+            context.log.info(f"File {file_path} is missing required columns: {missing_cols}. Skipping.")
+            return LoadResult(file_path=file_path, error=f"Missing columns: {missing_cols}")
+        for col in OPTIONAL_LOAD_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        if self.use_ledger:
+            ledger_entries.append((self._ledger_path(file_path), digest, len(df)))
+        conn = connection_pool.getconn()
+        try:
+            if self.load_mode == "copy":
+                counts = self._copy_summary(conn, pa.Table.from_pandas(df, preserve_index=False))
+            else:
+                counts = self._upsert_summary(conn, df)
+            if self.maintain_rollups and counts.written:
+                self._refresh_rollups(conn, set(pd.to_datetime(df["pickup_date"]).dt.date))
+            self._record_loads(conn, ledger_entries)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            context.log.error(f"Failed to load {file_path}: {e}")
+            return LoadResult(file_path=file_path, seconds=time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+        finally:
+            connection_pool.putconn(conn)
+        context.log.info(f"Data from file {file_path} loaded successfully.")
+        return LoadResult(
+            file_path=file_path, rows=len(df), seconds=time.perf_counter() - start,
+            inserted=counts.inserted, updated=counts.updated, unchanged=counts.unchanged,
+        )
+
+    def load_summary_table(self, context: AssetExecutionContext, summary: pa.Table, partition_key: str | None = None) -> LoadResult:
+        """
+        Loads a daily summary handed over as an Arrow table (e.g. memory-mapped by the
+        ``ArrowIPCIOManager``) into 'trip_summary', without reading the Parquet files again.
+
+        With ``use_ledger`` and a ``partition_key`` the table stands for the daily summary
+        files of that month: when the ledger already holds all of them with their current
+        content nothing is written, otherwise they are recorded in the load's transaction.
+
+        A full refresh only loads the summary files, see ``load_parquet_files``; a resource
+        with ``full_refresh`` set rejects single summaries.
+        """
+        self._check_load_mode()
+        if self.full_refresh:
+            raise ValueError("A full refresh replaces all of 'trip_summary' from the summary files, use load_parquet_files")
+        if summary.num_rows == 0:
+            context.log.info("No summary rows to load.")
+            return LoadResult(file_path=None)
+        start = time.perf_counter()
+        with self.pooled_connection() as conn:
+            pickup_dates = {day for day in pc.unique(pc.cast(summary["pickup_date"], pa.date32())).to_pylist() if day}
+            self._ensure_partitions(context, conn, {(day.year, day.month) for day in pickup_dates})
+            ledger_entries = []
+            if self.use_ledger and partition_key:
+                loaded = self.read_load_ledger(conn)
+                ledger_entries = [
+                    (self._ledger_path(file_path), file_sha256(file_path), summary.num_rows)
+                    for file_path in summary_dataset_files(self.output_folder, "daily", partition_key)
+                ]
+                if ledger_entries and all(loaded.get(path) == digest for path, digest, _ in ledger_entries):
+                    context.log.info(f"Summary of {partition_key} is unchanged since its last load. Skipping.")
+                    return LoadResult(file_path=None, skipped=True)
+            summary = with_optional_columns(summary)
+            if self.load_mode == "copy":
+                counts = self._copy_summary(conn, summary)
             else:
-                df["pickup_date"] = df["pickup_date"].apply(
-                    lambda x: datetime.fromisoformat(x).date() if isinstance(x, str) else x
+                counts = self._upsert_summary(conn, summary.to_pandas())
+            if self.maintain_rollups and counts.written:
+                self._refresh_rollups(conn, pickup_dates)
+            self._record_loads(conn, ledger_entries)
+            conn.commit()
+        context.log.info(f"Loaded {summary.num_rows} summary rows.")
+        context.log.info(f"{counts.inserted} rows inserted, {counts.updated} updated, {counts.unchanged} unchanged.")
+        return LoadResult(
+            file_path=None, rows=summary.num_rows, seconds=time.perf_counter() - start,
+            inserted=counts.inserted, updated=counts.updated, unchanged=counts.unchanged,
+        )
+
+    def _check_load_mode(self):
+        if self.load_mode not in LOAD_MODES:
+            raise ValueError(f"Unknown load mode '{self.load_mode}', expected one of {list(LOAD_MODES)}")
+
+    def _record_loads(self, conn, ledger_entries: list[tuple[str, str, int]]):
+        """Records ``(file_path, sha256, row_count)`` entries in the load ledger, without committing."""
+        if not ledger_entries:
+            return
+        with conn.cursor() as cur:
+            for entry in ledger_entries:
+                cur.execute(RECORD_LOAD_QUERY, entry)
+
+    def _refresh_rollups(self, conn, pickup_dates):
+        """
+        Recomputes the weekly and monthly periods containing ``pickup_dates`` from the daily
+        rows, without committing.
+
+        Loads that run in parallel may touch the same period (a week spanning two months),
+        so the refresh holds an advisory lock until commit: the next load's refresh then sees
+        the committed rows of the previous one instead of overwriting them with a stale total.
+        """
+        if not pickup_dates:
+            return
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (ROLLUP_LOCK_ID,))
+            for table, unit in ROLLUP_TABLES.items():
+                periods = sorted({rollup_period_start(day, unit) for day in pickup_dates})
+                cur.execute(
+                    REFRESH_ROLLUP_QUERY.format(table=table, unit=unit),
+                    {"first": periods[0], "last": periods[-1], "periods": periods},
                 )
-            with conn.cursor() as cur:
-                for _, row in df.iterrows():
-                    cur.execute(
-                        """
-                        INSERT INTO trip_summary 
-                            (uuid, pickup_date, total_passenger_count, total_distance, total_fare, avg_trip_distance, avg_fare_amount)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (uuid) DO UPDATE SET 
-                            pickup_date = EXCLUDED.pickup_date,
-                            total_passenger_count = EXCLUDED.total_passenger_count,
-                            total_distance = EXCLUDED.total_distance,
-                            total_fare = EXCLUDED.total_fare,
-                            avg_trip_distance = EXCLUDED.avg_trip_distance,
-                            avg_fare_amount = EXCLUDED.avg_fare_amount
-                        """,
-                        (
-                            row["uuid"],
-                            row["pickup_date"],
-                            row["total_passenger_count"],
-                            row["total_distance"],
-                            row["total_fare"],
-                            row["avg_trip_distance"],
-                            row["avg_fare_amount"],
-                        ),
-                    )
-                # Commit after processing each file
-                conn.commit()
-            context.log.info(f"Data from file {file_path} loaded successfully.")
+
+    def _rebuild_rollups(self, conn):
+        """
+        Recomputes every weekly and monthly period from the daily rows with counts and removes
+        the periods without such rows, without committing.
+        """
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT DISTINCT pickup_date FROM trip_summary "
+                "WHERE distance_count IS NOT NULL AND fare_count IS NOT NULL"
+            )
+            pickup_dates = {day for (day,) in cur.fetchall()}
+        self._refresh_rollups(conn, pickup_dates)
+        with conn.cursor() as cur:
+            for table, unit in ROLLUP_TABLES.items():
+                periods = sorted({rollup_period_start(day, unit) for day in pickup_dates})
+                cur.execute(f"DELETE FROM {table} WHERE period_start <> ALL(%s)", (periods,))
+
+    def _upsert_summary(self, conn, df: pd.DataFrame) -> UpsertCounts:
+        """Upserts the rows of a daily summary frame into 'trip_summary' one by one; the caller commits."""
+        return upsert_rows(conn, df)
+
+    def _copy_summary(self, conn, summary: pa.Table) -> UpsertCounts:
+        """Bulk-upserts a daily summary into 'trip_summary' through ``COPY``; the caller commits."""
+        return copy_upsert(conn, summary)
@@ -1,16 +1,603 @@
 import os
 import uuid
 import re
+import binascii
+import numpy as np
+import fcntl
+import glob
+import hashlib
+import json
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
+import multiprocessing
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
 from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from dagster import ConfigurableResource, AssetExecutionContext
+from src.etl.partitions import partition_file_suffix, partition_year_month, summary_dataset_files, summary_partition_dir
+from src.etl.setting.setting import PARQUET_ENGINE, PICKUP_DATETIME_COLUMN, SUMMARY_COLUMNS, ROLLUP_GRAINS
+
+
+def pickup_month_filter(file_name: str) -> pc.Expression:
+    """
+    Dataset filter keeping the trips picked up in the month named by the file.
+
+    ``yellow_tripdata_2023-01.parquet`` becomes a ``[2023-01-01, 2023-02-01)`` range on the
+    pickup column, which the Parquet reader checks against row-group statistics so that
+    out-of-range row groups are never decoded. Files without a year in their name fall back
+    to a ``month(pickup) == 1`` expression evaluated while scanning.
+    """
+    year, month, bounds = _pickup_month(file_name)
+    pickup = ds.field(PICKUP_DATETIME_COLUMN)
+    if bounds is None:
+        return pc.month(pickup) == month
+    start, end = bounds
+    return (pickup >= start) & (pickup < end)
+
+
+def _pickup_month(file_name: str) -> tuple[int | None, int, tuple[datetime, datetime] | None]:
+    """Year and month named by a raw file and, when the year is known, the ``[start, end)`` pickup range."""
+    year, month = re.search(r'(?:(\d{4})-)?(\d{2})\.parquet$', file_name).groups()
+    if year is None:
+        return None, int(month), None
+    year, month = int(year), int(month)
+    return year, month, (datetime(year, month, 1), datetime(year + month // 12, month % 12 + 1, 1))
+
+
+def dataset_name(file_name: str) -> str:
+    """Dataset a raw file belongs to: ``yellow_tripdata_2023-01.parquet`` -> ``yellow_tripdata``."""
+    return re.sub(r'[_-]?(?:\d{4}-)?\d{2}\.parquet$', '', file_name)
+
+
+def read_pickup_month(file_path: str, columns: list[str] = SUMMARY_COLUMNS) -> pa.Table:
+    """
+    Reads only the given columns of a raw trip file, filtered to its pickup month.
+
+    Args:
+        file_path: Path of a raw monthly trip Parquet file.
+        columns: Columns to read, ``SUMMARY_COLUMNS`` by default.
+
+    Returns:
+        pa.Table: The projected and filtered trips.
+    """
+    dataset = ds.dataset(file_path, format="parquet")
+    month_filter = pickup_month_filter(os.path.basename(file_path))
+    if _can_push_down(dataset):
+        return dataset.to_table(columns=columns, filter=month_filter)
+    return _parse_pickup(dataset.to_table(columns=columns)).filter(month_filter)
+
+
+def iter_pickup_month_batches(file_path: str, batch_size: int, columns: list[str] = SUMMARY_COLUMNS):
+    """
+    Streaming counterpart of ``read_pickup_month``: yields the trips in tables of at most
+    ``batch_size`` rows. Read-ahead is limited to one batch and column chunks are not
+    pre-buffered, so memory does not grow with the file.
+    """
+    dataset = ds.dataset(file_path, format="parquet")
+    month_filter = pickup_month_filter(os.path.basename(file_path))
+    push_down = _can_push_down(dataset)
+    scanner = dataset.scanner(
+        columns=columns,
+        filter=month_filter if push_down else None,
+        batch_size=batch_size,
+        batch_readahead=1,
+        fragment_readahead=1,
+        fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=False),
+    )
+    for batch in scanner.to_batches():
+        trips = pa.Table.from_batches([batch])
+        yield trips if push_down else _parse_pickup(trips).filter(month_filter)
+
+
+def _can_push_down(dataset: ds.Dataset) -> bool:
+    # Pickup times stored as strings cannot be compared in the reader, they are filtered after parsing
+    return pa.types.is_timestamp(dataset.schema.field(PICKUP_DATETIME_COLUMN).type)
+
+
+def _parse_pickup(trips: pa.Table) -> pa.Table:
+    pickup = pc.cast(trips[PICKUP_DATETIME_COLUMN], pa.timestamp("us"))
+    return trips.set_column(trips.schema.get_field_index(PICKUP_DATETIME_COLUMN), PICKUP_DATETIME_COLUMN, pickup)
+
+
+# Bump when a change to the engines or the summary schema should re-summarize every source file
+TRANSFORM_CODE_VERSION = 3
+
+TRANSFORM_MANIFEST_FILENAME = "_transform_manifest.json"
+
+
+def load_transform_manifest(output_folder: str) -> dict:
+    """
+    Read the transform manifest kept in ``output_folder``.
+
+    The manifest maps each source file name to the size, mtime and sha256 it had when it was
+    summarized, the ``TransformConfig.version`` used and the summaries written for it (paths
+    relative to ``output_folder``).
+
+    Returns:
+        dict: The manifest, or an empty one if nothing has been transformed yet.
+    """
+    manifest_path = os.path.join(output_folder, TRANSFORM_MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {"files": {}}
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def _update_transform_manifest(output_folder: str, files: dict, removed: list[str]):
+    """
+    Merge file records into the manifest on disk and drop the ``removed`` ones.
+
+    Partitioned runs of the transform asset can finish at the same time, so the read-merge-write
+    happens under an exclusive lock and the manifest is replaced atomically.
+    """
+    manifest_path = os.path.join(output_folder, TRANSFORM_MANIFEST_FILENAME)
+    with open(manifest_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        manifest = load_transform_manifest(output_folder)
+        manifest["files"].update(files)
+        for file_name in removed:
+            manifest["files"].pop(file_name, None)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+
+def source_fingerprint(file_path: str, previous: dict | None = None, chunk_size: int = 1024 * 1024) -> dict:
+    """
+    Size, mtime and sha256 of a source file.
+
+    When size and mtime still match ``previous`` its sha256 is reused instead of re-reading
+    the file; a touched but unchanged file is hashed again and still compares equal.
+    """
+    stat = os.stat(file_path)
+    fingerprint = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and all(previous.get(key) == value for key, value in fingerprint.items()):
+        return {**fingerprint, "sha256": previous["sha256"]}
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+    return {**fingerprint, "sha256": hasher.hexdigest()}
+
+
+def _is_up_to_date(previous: dict | None, fingerprint: dict, version: str, output_folder: str) -> bool:
+    return (
+        previous is not None
+        and previous["sha256"] == fingerprint["sha256"]
+        and previous["version"] == version
+        and all(os.path.exists(os.path.join(output_folder, path)) for path in previous["outputs"].values())
+    )
+
+
+def _fragment_partition_dir(fragment_path: str) -> str:
+    """Month folder of a fragment given relative to the staging folder: ``_fragments/<dir>/x.parquet`` -> ``<dir>``."""
+    return os.path.relpath(os.path.dirname(fragment_path), FRAGMENTS_FOLDER)
+
+
+def _remove_outputs(output_folder: str, paths) -> list[str]:
+    """Delete summary files that no longer belong to any source file."""
+    removed = []
+    for path in paths:
+        full_path = os.path.join(output_folder, path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+            removed.append(path)
+    return removed
+
+
+@dataclass(frozen=True)
+class TransformConfig:
+    """Picklable transform settings handed to the summary engines and worker processes."""
+    engine: str = PARQUET_ENGINE
+    batch_size: int = 131_072
+    rollups: tuple[str, ...] = ()
+    compression: str = "zstd"
+    compression_level: int | None = None
+    use_dictionary: bool = True
+    row_group_size: int = 1_048_576
+    write_statistics: bool = True
+
+    def write_options(self) -> dict:
+        """Keyword arguments of ``pq.write_table`` for summary files."""
+        return {
+            "compression": self.compression,
+            "compression_level": self.compression_level,
+            "use_dictionary": self.use_dictionary,
+            "row_group_size": self.row_group_size,
+            "write_statistics": self.write_statistics,
+        }
+
+    @property
+    def version(self) -> str:
+        """
+        Fingerprint of everything that changes the summaries written for a file: the transform
+        code version and the grains. Engine, batch size and Parquet write options only change
+        how they are computed and stored.
+        """
+        grains = json.dumps({"code": TRANSFORM_CODE_VERSION, "grains": self.grains}, sort_keys=True)
+        return hashlib.sha256(grains.encode()).hexdigest()[:16]
+
+    @property
+    def grains(self) -> dict[str, list[str]]:
+        """Group-by keys of every grain to compute; the daily summary is always included."""
+        return {grain: ["pickup_date", *ROLLUP_GRAINS[grain]] for grain in dict.fromkeys(("daily", *self.rollups))}
+
+    @property
+    def columns(self) -> list[str]:
+        """Raw columns needed for all grains, read once per file."""
+        keys = [key for keys in self.grains.values() for key in keys if key not in DERIVED_KEYS]
+        return list(dict.fromkeys([*SUMMARY_COLUMNS, *keys]))
+
+
+# Group-by keys computed from the pickup time rather than read from the raw file
+DERIVED_KEYS = ("pickup_date", "pickup_hour")
+
+SUMMARY_SCHEMA = pa.schema([
+    ("uuid", pa.string()),
+    ("pickup_date", pa.date32()),
+    ("total_passenger_count", pa.int64()),
+    ("total_distance", pa.float64()),
+    ("total_fare", pa.float64()),
+    ("avg_trip_distance", pa.float64()),
+    ("avg_fare_amount", pa.float64()),
+    # Non-null values behind each average, so summaries merge into exact means
+    ("distance_count", pa.int64()),
+    ("fare_count", pa.int64()),
+])
+
+
+def summary_schema(grain: str) -> pa.Schema:
+    """``SUMMARY_SCHEMA`` with the extra group-by keys of ``grain`` after ``pickup_date``."""
+    schema = SUMMARY_SCHEMA
+    for position, key in enumerate(ROLLUP_GRAINS[grain], start=2):
+        schema = schema.insert(position, pa.field(key, pa.int64()))
+    return schema
+
+
+# Namespace of the name-based keys of summary rows. Never change it: the stored rows are keyed by it.
+SUMMARY_KEY_NAMESPACE = uuid.UUID("6f0c8d4e-5b1a-5d3e-9c77-2f4e1a8b0d15")
+UUID_GROUPS = ((0, 8), (8, 12), (12, 16), (16, 20), (20, 32))
+
+
+def summary_keys(summary: pa.Table, dataset: str, grain: str) -> pa.Array:
+    """
+    Deterministic keys for the rows of a summary.
+
+    Every key is the version 5 UUID (SHA-1) of the row's natural key, dataset + grain +
+    pickup_date and the extra group-by keys of the grain, so re-transforming a file yields the
+    same keys, whatever the pandas, pyarrow or Python version, and the loader updates the
+    existing rows instead of inserting duplicates. The natural keys are joined and the digests
+    formatted vectorized; only the SHA-1 of each joined key runs in a Python loop, as Arrow has
+    no SHA-1 kernel. A month has a few thousand summary rows at most, so the loop costs
+    milliseconds (see ``summary_keys`` in ``benchmarks/transform_benchmark.py``).
+    """
+    parts = [pc.fill_null(pc.cast(summary[column], pa.string()), "") for column in ["pickup_date", *ROLLUP_GRAINS[grain]]]
+    natural_keys = pc.binary_join_element_wise(f"{dataset}|{grain}", *parts, "|")
+    namespace = SUMMARY_KEY_NAMESPACE.bytes
+    digests = np.frombuffer(
+        b"".join(hashlib.sha1(namespace + key.encode()).digest()[:16] for key in natural_keys.to_pylist()),
+        dtype=np.uint8,
+    ).reshape(-1, 16).copy()
+    # RFC 4122 version 5 and variant bits, as uuid.uuid5 sets them
+    digests[:, 6] = (digests[:, 6] & 0x0F) | 0x50
+    digests[:, 8] = (digests[:, 8] & 0x3F) | 0x80
+    hex_digests = pa.array(np.frombuffer(binascii.hexlify(digests.tobytes()), dtype="S32").astype(str), pa.string())
+    return pc.binary_join_element_wise(*(pc.utf8_slice_codeunits(hex_digests, start, stop) for start, stop in UUID_GROUPS), "-")
+
+
+SUM_OPTIONS = pc.ScalarAggregateOptions(min_count=0)
+
+# Number of per-batch partial aggregates kept before they are folded into one
+PARTIALS_PER_MERGE = 32
+
+
+def summarize_with_pandas(file_path: str, config: TransformConfig) -> dict[str, pa.Table]:
+    """Summaries of a raw trip file for every grain, computed with pandas group-bys."""
+    df = read_pickup_month(file_path, config.columns).to_pandas()
+    df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
+    df['pickup_date'] = df['tpep_pickup_datetime'].dt.date
+    df['pickup_hour'] = df['tpep_pickup_datetime'].dt.hour
+    summaries = {}
+    for grain, keys in config.grains.items():
+        summary = df.groupby(keys, dropna=False).agg(
+            total_passenger_count=('passenger_count', 'count'),
+            total_distance=('trip_distance', 'sum'),
+            total_fare=('fare_amount', 'sum'),
+            avg_trip_distance=('trip_distance', 'mean'),
+            avg_fare_amount=('fare_amount', 'mean'),
+            distance_count=('trip_distance', 'count'),
+            fare_count=('fare_amount', 'count')
+        ).reset_index()
+        summaries[grain] = pa.Table.from_pandas(summary, preserve_index=False)
+    return summaries
+
+
+def summarize_with_arrow(file_path: str, config: TransformConfig) -> dict[str, pa.Table]:
+    """
+    Summaries of a raw trip file for every grain, computed with Arrow compute kernels and
+    Arrow group-bys.
+
+    Skips the pandas conversion and the object-dtype ``date`` column; null handling matches
+    pandas (``count`` ignores nulls, sums of an all-null group are 0).
+    """
+    trips = _with_derived_keys(read_pickup_month(file_path, config.columns))
+    summaries = {}
+    for grain, keys in config.grains.items():
+        summary = trips.group_by(keys).aggregate([
+            ("passenger_count", "count"),
+            ("trip_distance", "sum", SUM_OPTIONS),
+            ("fare_amount", "sum", SUM_OPTIONS),
+            ("trip_distance", "mean"),
+            ("fare_amount", "mean"),
+            ("trip_distance", "count"),
+            ("fare_amount", "count"),
+        ])
+        summaries[grain] = pa.table({
+            **{key: summary[key] for key in keys},
+            "total_passenger_count": summary["passenger_count_count"],
+            "total_distance": summary["trip_distance_sum"],
+            "total_fare": summary["fare_amount_sum"],
+            "avg_trip_distance": summary["trip_distance_mean"],
+            "avg_fare_amount": summary["fare_amount_mean"],
+            "distance_count": summary["trip_distance_count"],
+            "fare_count": summary["fare_amount_count"],
+        }).sort_by([(key, "ascending") for key in keys])
+    return summaries
+
+
+def summarize_streaming(file_path: str, config: TransformConfig) -> dict[str, pa.Table]:
+    """
+    Summaries of a raw trip file for every grain, computed batch by batch with bounded memory.
+
+    Every batch of ``config.batch_size`` rows is reduced to mergeable partial aggregates per
+    group (counts and sums); partials are folded together as they accumulate and the means
+    are only derived from the merged sums and counts at the end. Peak memory is set by the
+    batch size, not by the size of the file.
+    """
+    partials = {grain: [] for grain in config.grains}
+    for trips in iter_pickup_month_batches(file_path, config.batch_size, config.columns):
+        trips = _with_derived_keys(trips)
+        for grain, keys in config.grains.items():
+            partials[grain].append(_partial_aggregates(trips, keys))
+            if len(partials[grain]) >= PARTIALS_PER_MERGE:
+                partials[grain] = [_merge_partials(partials[grain], keys)]
+
+    summaries = {}
+    for grain, keys in config.grains.items():
+        if not partials[grain]:
+            summaries[grain] = summary_schema(grain).empty_table().drop_columns(["uuid"])
+            continue
+        merged = _merge_partials(partials[grain], keys)
+        summaries[grain] = pa.table({
+            **{key: merged[key] for key in keys},
+            "total_passenger_count": merged["passenger_count_count"],
+            "total_distance": merged["trip_distance_sum"],
+            "total_fare": merged["fare_amount_sum"],
+            "avg_trip_distance": _mean(merged["trip_distance_sum"], merged["trip_distance_count"]),
+            "avg_fare_amount": _mean(merged["fare_amount_sum"], merged["fare_amount_count"]),
+            "distance_count": merged["trip_distance_count"],
+            "fare_count": merged["fare_amount_count"],
+        }).sort_by([(key, "ascending") for key in keys])
+    return summaries
+
+
+def _with_derived_keys(trips: pa.Table) -> pa.Table:
+    pickup = trips[PICKUP_DATETIME_COLUMN]
+    return (
+        trips.append_column("pickup_date", pc.cast(pc.floor_temporal(pickup, unit="day"), pa.date32()))
+        .append_column("pickup_hour", pc.hour(pickup))
+    )
+
+
+def _partial_aggregates(trips: pa.Table, keys: list[str]) -> pa.Table:
+    return trips.group_by(keys).aggregate([
+        ("passenger_count", "count"),
+        ("trip_distance", "sum", SUM_OPTIONS),
+        ("trip_distance", "count"),
+        ("fare_amount", "sum", SUM_OPTIONS),
+        ("fare_amount", "count"),
+    ])
+
+
+def _merge_partials(partials: list[pa.Table], keys: list[str]) -> pa.Table:
+    columns = [name for name in partials[0].column_names if name not in keys]
+    merged = pa.concat_tables(partials).group_by(keys).aggregate([(name, "sum") for name in columns])
+    return merged.rename_columns([name if name in keys else name.removesuffix("_sum") for name in merged.column_names])
+
+
+def _mean(total: pa.ChunkedArray, count: pa.ChunkedArray) -> pa.ChunkedArray:
+    return pc.if_else(pc.greater(count, 0), pc.divide(total, pc.cast(count, pa.float64())), None)
+
+
+def summarize_with_duckdb(file_path: str, config: TransformConfig) -> dict[str, pa.Table]:
+    """
+    Summaries of a raw trip file for every grain, computed by embedded DuckDB.
+
+    The month filter and one ``GROUPING SETS`` aggregation over all grains run as a single
+    multi-threaded query straight on the Parquet file; ``GROUPING()`` tells the grains apart so
+    null keys in the data stay their own group. Needs the optional ``duckdb`` package.
+    """
+    import duckdb
+
+    year, month, bounds = _pickup_month(os.path.basename(file_path))
+    raw_keys = [column for column in config.columns if column not in SUMMARY_COLUMNS]
+    key_columns = list(dict.fromkeys(key for keys in config.grains.values() for key in keys[1:]))
+    month_filter, parameters = ("month(pickup) = ?", [month]) if bounds is None else ("pickup >= ? AND pickup < ?", list(bounds))
+    grouping_sets = ", ".join(f"({', '.join(keys)})" for keys in config.grains.values())
+    grouping = f"GROUPING({', '.join(key_columns)})" if key_columns else "0"
+    query = f"""
+        WITH trips AS (
+            SELECT CAST({PICKUP_DATETIME_COLUMN} AS TIMESTAMP) AS pickup, passenger_count, trip_distance, fare_amount
+                {"".join(f", {column}" for column in raw_keys)}
+            FROM read_parquet(?)
+        )
+        SELECT
+            {grouping} AS grouping_id,
+            CAST(pickup AS DATE) AS pickup_date,
+            {"".join(f"{key}, " for key in key_columns)}
+            count(passenger_count) AS total_passenger_count,
+            coalesce(sum(trip_distance), 0) AS total_distance,
+            coalesce(sum(fare_amount), 0) AS total_fare,
+            avg(trip_distance) AS avg_trip_distance,
+            avg(fare_amount) AS avg_fare_amount,
+            count(trip_distance) AS distance_count,
+            count(fare_amount) AS fare_count
+        FROM (SELECT *, hour(pickup) AS pickup_hour FROM trips WHERE {month_filter})
+        GROUP BY GROUPING SETS ({grouping_sets})
+    """
+    with duckdb.connect() as connection:
+        summary = connection.execute(query, [file_path, *parameters]).to_arrow_table()
+
+    summaries = {}
+    for grain, keys in config.grains.items():
+        # GROUPING() sets the bit of every key column that is not part of the grain
+        grain_id = sum(1 << (len(key_columns) - 1 - i) for i, key in enumerate(key_columns) if key not in keys)
+        rows = summary.filter(pc.equal(summary["grouping_id"], grain_id))
+        summaries[grain] = rows.select([*keys, *SUMMARY_SCHEMA.names[2:]]).sort_by([(key, "ascending") for key in keys])
+    return summaries
+
+
+# Selected through ParquetTransformResource.engine, PARQUET_ENGINE by default
+SUMMARY_ENGINES = {
+    "pandas": summarize_with_pandas,
+    "pyarrow": summarize_with_arrow,
+    "streaming": summarize_streaming,
+    "duckdb": summarize_with_duckdb,
+}
+
+
+@dataclass
+class TransformResult:
+    """Outcome of summarizing one source file, small enough to send back from a worker process."""
+    file_path: str
+    output_paths: dict[str, str] = field(default_factory=dict)
+    rows: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+    skipped: bool = False
+
+
+# Per-source summaries, compacted into the dataset folders; pyarrow datasets ignore "_" folders
+FRAGMENTS_FOLDER = "_fragments"
+
+COMPACTED_FILE_NAME = "summary.parquet"
+
+
+def summary_fragment_path(output_folder: str, grain: str, year: int, month: int, dataset: str) -> str:
+    """
+    Where the summary of one source file for ``grain`` is written before compaction.
+
+    Returns:
+        str: e.g. ``<output_folder>/_fragments/daily/year=2023/month=01/yellow_tripdata.parquet``.
+    """
+    return os.path.join(output_folder, FRAGMENTS_FOLDER, summary_partition_dir(grain, year, month), f"{dataset}.parquet")
+
+
+def _summary_month(file_name: str, daily: pa.Table) -> tuple[int, int] | None:
+    """Year and month a summary belongs to: from the file name, else from its first pickup date."""
+    match = re.search(r'(\d{4}-\d{2})\.parquet$', file_name)
+    if match:
+        return partition_year_month(match.group(1))
+    if daily.num_rows == 0:
+        return None
+    first = pc.min(daily["pickup_date"]).as_py()
+    return first.year, first.month
+
+
+def summarize_file(file_path: str, output_folder: str, config: TransformConfig) -> TransformResult:
+    """
+    Summarizes one raw trip file into every configured grain with a single read of the file.
+
+    Each summary is written as a fragment under ``FRAGMENTS_FOLDER`` in the ``year=/month=``
+    folder of its grain; ``compact_summary_partition`` merges the fragments of a month into the
+    dataset file readers use. Only takes picklable arguments so it can run in a worker process.
+
+    Raises:
+        ValueError: If ``config.engine`` or one of ``config.rollups`` is unknown.
+    """
+    if config.engine not in SUMMARY_ENGINES:
+        raise ValueError(f"Unknown transform engine '{config.engine}', expected one of {sorted(SUMMARY_ENGINES)}")
+    unknown = [grain for grain in config.rollups if grain not in ROLLUP_GRAINS]
+    if unknown:
+        raise ValueError(f"Unknown rollup grains {unknown}, expected any of {sorted(ROLLUP_GRAINS)}")
+    start = time.perf_counter()
+    file_name = os.path.basename(file_path)
+    result = TransformResult(file_path=file_path)
+    summaries = SUMMARY_ENGINES[config.engine](file_path, config)
+    month = _summary_month(file_name, summaries["daily"])
+    if month is None:
+        # No trips and no month in the file name: nothing to write
+        return result
+    for grain, summary in summaries.items():
+        schema = summary_schema(grain)
+        summary = summary.add_column(0, "uuid", summary_keys(summary, dataset_name(file_name), grain))
+        output_file_path = summary_fragment_path(output_folder, grain, *month, dataset_name(file_name))
+        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+        pq.write_table(summary.select(schema.names).cast(schema), output_file_path, **config.write_options())
+        result.output_paths[grain] = output_file_path
+        if grain == "daily":
+            result.rows = summary.num_rows
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def compact_summary_partition(output_folder: str, partition_dir: str, config: TransformConfig) -> str | None:
+    """
+    Merges the fragments of one month of a summary dataset into a single sorted file.
+
+    ``partition_dir`` is relative to ``output_folder`` (see ``summary_partition_dir``). Rows are
+    sorted by their group-by keys so row-group statistics prune date ranges, and the file is
+    replaced atomically. A month without fragments left loses its dataset file.
+
+    Returns:
+        str | None: Path of the compacted file, or None if the month has no fragments.
+    """
+    grain = partition_dir.split(os.sep)[0]
+    fragments = sorted(glob.glob(os.path.join(output_folder, FRAGMENTS_FOLDER, partition_dir, "*.parquet")))
+    dataset_path = os.path.join(output_folder, partition_dir, COMPACTED_FILE_NAME)
+    if not fragments:
+        if os.path.exists(dataset_path):
+            os.remove(dataset_path)
+        return None
+    schema = summary_schema(grain)
+    summary = pa.concat_tables(pq.ParquetFile(fragment).read().cast(schema) for fragment in fragments)
+    summary = summary.sort_by([(key, "ascending") for key in ["pickup_date", *ROLLUP_GRAINS[grain]]])
+    os.makedirs(os.path.dirname(dataset_path), exist_ok=True)
+    # Dot-prefixed so readers globbing the folder never see a half-written file
+    tmp_path = os.path.join(os.path.dirname(dataset_path), f".{COMPACTED_FILE_NAME}.tmp")
+    pq.write_table(summary, tmp_path, **config.write_options())
+    os.replace(tmp_path, dataset_path)
+    return dataset_path
+
+
+def transform_file_worker(file_path: str, output_folder: str, config: TransformConfig) -> TransformResult:
+    """``summarize_file`` that reports failures in the result instead of raising."""
+    try:
+        return summarize_file(file_path, output_folder, config)
+    except Exception as e:
+        return TransformResult(file_path=file_path, error=f"{type(e).__name__}: {e}")
 
 
 class ParquetTransformResource(ConfigurableResource):
     source_folder: str
     output_folder: str
     max_workers: int
+    engine: str = PARQUET_ENGINE
+    parallel: bool = False
+    batch_size: int = 131_072
+    rollups: list[str] = []
+    force: bool = False
+    compression: str = "zstd"
+    compression_level: int | None = None
+    use_dictionary: bool = True
+    row_group_size: int = 1_048_576
+    write_statistics: bool = True
 
     def ensure_staging_folder_exists(self, context:AssetExecutionContext):
         """Ensures the output folder exists."""
@@ -18,59 +605,173 @@ class ParquetTransformResource(ConfigurableResource):
             os.makedirs(self.output_folder)
             context.log.info(f"Created output folder: {self.output_folder}")
         return f"Folder already exist in the folder"
+
+    def transform_config(self) -> TransformConfig:
+        """Picklable snapshot of the settings the summary engines need."""
+        return TransformConfig(
+            engine=self.engine,
+            batch_size=self.batch_size,
+            rollups=tuple(self.rollups),
+            compression=self.compression,
+            compression_level=self.compression_level,
+            use_dictionary=self.use_dictionary,
+            row_group_size=self.row_group_size,
+            write_statistics=self.write_statistics,
+        )
         
     def process_parquet_file(self, file_path, context:AssetExecutionContext):
-        """Processes a single Parquet file."""
+        """Processes a single Parquet file with the configured summary ``engine``."""
         file_name = os.path.basename(file_path)
-        parquet_data = pq.read_table(file_path)
-        df = parquet_data.to_pandas()
-        month_in_file = re.search(r'-(\d{2})\.parquet$', file_name).group(1)
-        df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-        df = df[df['tpep_pickup_datetime'].dt.month == int(month_in_file)]
-        df['pickup_date'] = df['tpep_pickup_datetime'].dt.date
-        summary = df.groupby('pickup_date').agg(
-            total_passenger_count=('passenger_count', 'count'),
-            total_distance=('trip_distance', 'sum'),
-            total_fare=('fare_amount', 'sum'),
-            avg_trip_distance=('trip_distance', 'mean'),
-            avg_fare_amount=('fare_amount', 'mean')
-        ).reset_index()
+        config = self.transform_config()
+        result = summarize_file(file_path, self.output_folder, config)
         context.log.info(f"Generated summary statistics for file: {file_name} success")
-        summary['uuid'] = [str(uuid.uuid4()) for _ in range(len(summary))]
-        summary = summary[['uuid', 'pickup_date', 'total_passenger_count', 'total_distance', 'total_fare', 'avg_trip_distance', 'avg_fare_amount']]
-        output_file_name = f"summary_{file_name}"
-        output_file_path = os.path.join(self.output_folder, output_file_name)
-        summary.to_parquet(output_file_path, index=False)
-        context.log.info(f"Saved summary to Parquet file: {output_file_name}")
+        for output_path in result.output_paths.values():
+            partition_dir = _fragment_partition_dir(os.path.relpath(output_path, self.output_folder))
+            dataset_path = compact_summary_partition(self.output_folder, partition_dir, config)
+            context.log.info(f"Saved summary to Parquet file: {os.path.relpath(dataset_path, self.output_folder)}")
         
         return f"Successfully processed {file_name}"
 
-    # def transform_parquet_files(self, context:AssetExecutionContext):
-    #     """Transforms multiple Parquet files in parallel."""
-    #     parquet_files = [os.path.join(self.source_folder, f) for f in os.listdir(self.source_folder) if f.endswith(".parquet")]
-    #     context.log.info(f"Found {len(parquet_files)} Parquet files to process.")
-        
-    #     with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
-    #         futures = {executor.submit(self.process_parquet_file, file, context): file for file in parquet_files}
-    #         for future in as_completed(futures):
-    #             result = future.result()
-    #             context.log.info(result)
-        
-    #     context.log.info(f"Transformation complete. Summaries saved in {self.output_folder}")
+    def transform_parquet_files(self, context: AssetExecutionContext, partition_key: str | None = None) -> list["TransformResult"]:
+        """
+        Transforms multiple Parquet files, optionally only those of one monthly partition.
+
+        Only new or changed source files are summarized: a file whose sha256 and
+        ``TransformConfig.version`` match the transform manifest and whose summaries still exist
+        is skipped, unless ``force`` is set. Summaries of source files that disappeared, or of
+        grains that are no longer configured, are deleted. Every month folder whose fragments
+        changed is compacted again afterwards.
 
-    def transform_parquet_files(self, context: AssetExecutionContext):
-        """Transforms multiple Parquet files sequentially."""
+        Files are processed one after another unless ``parallel`` is set, in which case up to
+        ``max_workers`` worker processes summarize them concurrently. Workers only receive the
+        file path, output folder and ``TransformConfig`` and send back a ``TransformResult``, so a
+        failing file is reported without stopping the other workers.
+
+        Returns:
+            list[TransformResult]: One result per source file, skipped ones included.
+        """
         # Get all Parquet files in the source folder
-        parquet_files = [os.path.join(self.source_folder, f) for f in os.listdir(self.source_folder) if f.endswith(".parquet")]
-        context.log.info(f"Found {len(parquet_files)} Parquet files to process.")
-        
-        # Process each file sequentially
-        for file_path in parquet_files:
-            try:
-                result = self.process_parquet_file(file_path, context)
-                context.log.info(result)
-            except Exception as e:
-                context.log.error(f"Error processing file {file_path}: {e}")
-        
+        suffix = partition_file_suffix(partition_key)
+        source_files = sorted(f for f in os.listdir(self.source_folder) if f.endswith(suffix))
+        context.log.info(f"Found {len(source_files)} Parquet files to process.")
+
+        config = self.transform_config()
+        version = config.version
+        manifest = load_transform_manifest(self.output_folder)["files"]
+        fingerprints, parquet_files, results = {}, [], []
+        for file_name in source_files:
+            file_path = os.path.join(self.source_folder, file_name)
+            previous = manifest.get(file_name)
+            fingerprints[file_name] = source_fingerprint(file_path, previous)
+            if not self.force and _is_up_to_date(previous, fingerprints[file_name], version, self.output_folder):
+                results.append(TransformResult(file_path=file_path, rows=previous["rows"], skipped=True))
+            else:
+                parquet_files.append(file_path)
+        if results:
+            context.log.info(f"Skipping {len(results)} unchanged files, {len(parquet_files)} to transform.")
+
+        if self.parallel and len(parquet_files) > 1:
+            # spawn rather than fork: the Dagster process runs threads that must not be forked
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                futures = {
+                    executor.submit(transform_file_worker, file_path, self.output_folder, config): file_path
+                    for file_path in parquet_files
+                }
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        result = TransformResult(file_path=futures[future], error=f"Worker process died: {e}")
+                    results.append(self._log_result(context, result))
+        else:
+            for file_path in parquet_files:
+                results.append(self._log_result(context, transform_file_worker(file_path, self.output_folder, config)))
+
+        touched = self._record_results(context, results, fingerprints, manifest, version, suffix)
+        for result in results:
+            # Re-create dataset files that went missing even when their fragments are unchanged
+            if result.skipped:
+                touched |= {
+                    _fragment_partition_dir(path) for path in manifest[os.path.basename(result.file_path)]["outputs"].values()
+                    if not os.path.exists(os.path.join(self.output_folder, _fragment_partition_dir(path), COMPACTED_FILE_NAME))
+                }
+        for partition_dir in sorted(touched):
+            compact_summary_partition(self.output_folder, partition_dir, config)
+        if touched:
+            context.log.info(f"Compacted {len(touched)} summary partitions.")
+        failed = [result for result in results if result.error]
         context.log.info(f"Transformation complete. Summaries saved in {self.output_folder}")
+        if failed:
+            context.log.error(f"{len(failed)} of {len(results)} files failed to transform.")
+        return results
+
+    def _record_results(self, context: AssetExecutionContext, results: list["TransformResult"], fingerprints: dict,
+                        manifest: dict, version: str, suffix: str) -> set[str]:
+        """
+        Record the transformed files in the manifest and delete the summaries they no longer own.
+
+        Returns:
+            set[str]: Month folders (see ``summary_partition_dir``) whose fragments changed.
+        """
+        files, orphans = {}, []
+        for result in results:
+            if result.error or result.skipped:
+                continue
+            file_name = os.path.basename(result.file_path)
+            outputs = {grain: os.path.relpath(path, self.output_folder) for grain, path in result.output_paths.items()}
+            previous = manifest.get(file_name, {}).get("outputs", {})
+            orphans += [path for path in previous.values() if path not in outputs.values()]
+            files[file_name] = {**fingerprints[file_name], "version": version, "rows": result.rows, "outputs": outputs}
+
+        # Source files of this partition that were deleted since they were summarized
+        removed = [name for name in manifest if name.endswith(suffix) and name not in fingerprints]
+        for file_name in removed:
+            orphans += manifest[file_name]["outputs"].values()
+        deleted = _remove_outputs(self.output_folder, orphans)
+        if deleted:
+            context.log.info(f"Removed {len(deleted)} orphaned summaries: {deleted}")
+        _update_transform_manifest(self.output_folder, files, removed)
+        new_outputs = [path for record in files.values() for path in record["outputs"].values()]
+        return {_fragment_partition_dir(path) for path in [*new_outputs, *orphans]}
+
+    def read_summary(self, partition_key: str | None = None, grain: str = "daily") -> pa.Table:
+        """
+        Reads the compacted summary dataset of one grain, optionally of one month only.
+
+        Returns:
+            pa.Table: The summary rows, an empty table with the grain's schema if there are none.
+        """
+        files = summary_dataset_files(self.output_folder, grain, partition_key)
+        schema = summary_schema(grain)
+        return pa.concat_tables([pq.ParquetFile(path).read().cast(schema) for path in files]) if files else schema.empty_table()
+
+    def compact_summaries(self, context: AssetExecutionContext, partition_key: str | None = None) -> list[str]:
+        """
+        Rebuilds the dataset files of every grain from their fragments, optionally for one month.
+
+        Returns:
+            list[str]: The compacted files.
+        """
+        month = os.path.join("year=*", "month=*")
+        if partition_key is not None:
+            month = os.path.relpath(summary_partition_dir(".", *partition_year_month(partition_key)))
+        fragments_folder = os.path.join(self.output_folder, FRAGMENTS_FOLDER)
+        # Months with fragments are rebuilt, dataset files left without fragments are removed
+        partition_dirs = {
+            os.path.relpath(path, folder)
+            for folder in (fragments_folder, self.output_folder)
+            for path in glob.glob(os.path.join(folder, "*", month))
+        }
+        config = self.transform_config()
+        compacted = [compact_summary_partition(self.output_folder, partition_dir, config) for partition_dir in sorted(partition_dirs)]
+        context.log.info(f"Compacted {len(partition_dirs)} summary partitions.")
+        return [path for path in compacted if path]
 
+    def _log_result(self, context: AssetExecutionContext, result: "TransformResult") -> "TransformResult":
+        file_name = os.path.basename(result.file_path)
+        if result.error:
+            context.log.error(f"Error processing file {result.file_path}: {result.error}")
+        else:
+            context.log.info(f"Successfully processed {file_name}")
+            context.log.info(f"{file_name}: {result.rows} summary rows in {result.seconds:.2f}s")
+        return result
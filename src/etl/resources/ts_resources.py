@@ -1,6 +1,226 @@
 from dagster import ConfigurableResource,AssetExecutionContext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import asyncio
+import fcntl
+import hashlib
+import json
 import os
+import time
 import httpx
+from src.etl.partitions import partition_file_suffix
+
+PARTIAL_SUFFIX = ".part"
+
+# Kept next to a partial download: the validator of the response it holds, sent as If-Range on resume
+VALIDATOR_SUFFIX = ".validator"
+
+MANIFEST_FILENAME = "_download_manifest.json"
+
+# ``last_run`` key of runs that are not restricted to a monthly partition
+ALL_PARTITIONS_KEY = "__all__"
+
+
+def load_download_manifest(download_folder: str) -> dict:
+    """
+    Read the download manifest kept in ``download_folder``.
+
+    The manifest maps each file name to the ETag, Last-Modified, size and sha256 of the
+    copy on disk; ``last_run`` lists, per monthly partition key (``__all__`` for unpartitioned
+    runs), which files the most recent run of that partition actually changed.
+
+    Returns:
+        dict: The manifest, or an empty one if nothing has been downloaded yet.
+    """
+    manifest_path = os.path.join(download_folder, MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {"files": {}, "last_run": {}}
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def _update_download_manifest(
+    download_folder: str, files: dict | None = None, last_run: dict | None = None, run_key: str = ALL_PARTITIONS_KEY,
+):
+    """
+    Merge file records (and optionally the ``last_run`` of ``run_key``) into the manifest on disk.
+
+    Partitioned runs of the download asset can finish at the same time, so the read-merge-write
+    happens under an exclusive lock and the manifest is replaced atomically; each run only
+    replaces the ``last_run`` entry of its own partition.
+    """
+    manifest_path = os.path.join(download_folder, MANIFEST_FILENAME)
+    with open(manifest_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        manifest = load_download_manifest(download_folder)
+        manifest["files"].update(files or {})
+        if last_run is not None:
+            runs = manifest.get("last_run", {})
+            if not all(isinstance(run, dict) for run in runs.values()):
+                # A single run record written before runs were kept per partition
+                runs = {}
+            manifest["last_run"] = {**runs, run_key: last_run}
+        tmp_path = manifest_path + PARTIAL_SUFFIX
+        with open(tmp_path, "w") as file:
+            json.dump(manifest, file, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+
+def _conditional_headers(previous: dict | None, file_path: str) -> dict:
+    """If-None-Match / If-Modified-Since headers for a file whose copy on disk matches the manifest."""
+    if not previous or not os.path.exists(file_path) or os.path.getsize(file_path) != previous.get("size"):
+        return {}
+    headers = {}
+    if previous.get("etag"):
+        headers["If-None-Match"] = previous["etag"]
+    if previous.get("last_modified"):
+        headers["If-Modified-Since"] = previous["last_modified"]
+    return headers
+
+
+def _hash_existing(part_path: str, chunk_size: int):
+    """sha256 hasher primed with the bytes already in a partial download."""
+    hasher = hashlib.sha256()
+    with open(part_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            hasher.update(chunk)
+    return hasher
+
+
+def _manifest_record(url: str, response: httpx.Response, size: int, sha256: str) -> dict:
+    return {
+        "url": url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "size": size,
+        "sha256": sha256,
+        "downloaded_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def _resume_offset(part_path: str) -> int:
+    """Size of a previously interrupted download, or 0 if there is none."""
+    return os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+
+def _range_headers(offset: int, validator: str | None = None) -> dict:
+    """
+    Range request continuing a partial download. With ``If-Range`` the server only sends the
+    rest when the file is still the one the partial download started, and the whole new file
+    (a 200) otherwise.
+    """
+    if not offset:
+        return {}
+    headers = {"Range": f"bytes={offset}-"}
+    if validator:
+        headers["If-Range"] = validator
+    return headers
+
+
+def _response_validator(response: httpx.Response) -> str | None:
+    """Validator usable in ``If-Range``: a strong ETag, or else Last-Modified."""
+    etag = response.headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return response.headers.get("Last-Modified")
+
+
+def _read_validator(part_path: str) -> str | None:
+    try:
+        with open(part_path + VALIDATOR_SUFFIX) as file:
+            return file.read() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_validator(part_path: str, validator: str | None):
+    """Records the validator of the response being written to ``part_path``, or forgets a stale one."""
+    if validator:
+        with open(part_path + VALIDATOR_SUFFIX, "w") as file:
+            file.write(validator)
+    else:
+        _remove_file(part_path + VALIDATOR_SUFFIX)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _discard_partial(part_path: str):
+    """Removes a partial download and its validator."""
+    _remove_file(part_path)
+    _remove_file(part_path + VALIDATOR_SUFFIX)
+
+
+def _must_restart(response: httpx.Response, offset: int) -> bool:
+    """True when a partial download cannot be resumed and has to start from byte 0."""
+    if not offset:
+        return False
+    if response.status_code == 416:
+        return True
+    return response.status_code == 206 and not response.headers.get("Content-Range", "").startswith(f"bytes {offset}-")
+
+
+def _open_mode(response: httpx.Response) -> str:
+    # 206 continues the partial file, a plain 200 means the server ignored the Range header
+    return "ab" if response.status_code == 206 else "wb"
+
+
+def _write_chunk(file, hasher, chunk: bytes):
+    file.write(chunk)
+    hasher.update(chunk)
+
+
+def _sync_file(file) -> int:
+    """Flush and fsync a finished download; returns its size."""
+    file.flush()
+    os.fsync(file.fileno())
+    return file.tell()
+
+
+def _finalize_download(part_path: str, file_path: str):
+    """Atomically move a completed download into place and persist the rename."""
+    os.replace(part_path, file_path)
+    _remove_file(part_path + VALIDATOR_SUFFIX)
+    dir_fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+@dataclass
+class DownloadSummary:
+    """Per-run statistics for a batch of downloads.
+
+    ``downloaded`` holds the files whose content changed this run, ``unchanged`` the ones
+    skipped by a 304 or re-downloaded with an identical hash.
+    """
+    downloaded: list[str] = field(default_factory=list)
+    unchanged: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    bytes_downloaded: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput_mb_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.bytes_downloaded / (1024 * 1024) / self.elapsed_seconds
+
+    def as_metadata(self) -> dict:
+        return {
+            "files_downloaded": len(self.downloaded),
+            "files_unchanged": len(self.unchanged),
+            "files_failed": len(self.failed),
+            "changed_files": sorted(self.downloaded),
+            "bytes_downloaded": self.bytes_downloaded,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "throughput_mb_per_second": round(self.throughput_mb_per_second, 3),
+        }
 
 
 class ParquetDownloadResource(ConfigurableResource):
@@ -8,10 +228,16 @@ class ParquetDownloadResource(ConfigurableResource):
     years: list[int]
     months: list[int]
     download_folder: str
+    concurrent: bool = False
+    max_concurrency: int = 4
+    max_retries: int = 3
+    backoff_factor: float = 1.0
+    timeout: float = 300.0
+    chunk_size: int = 1024 * 1024
 
     def ensure_download_folder_exists(self, context:AssetExecutionContext):
         """
-        Ensures that the download folder exists. 
+        Ensures that the download folder exists.
         If the folder does not exist, it is created.
 
         Args:
@@ -23,28 +249,218 @@ class ParquetDownloadResource(ConfigurableResource):
         else:
             context.log.info(f"Download folder already exists at {self.download_folder}")
 
-    def download_parquet_data(self, context:AssetExecutionContext):
+    def download_targets(self, partition_key: str | None = None):
         """
-        Downloads Parquet files from a specified URL for each year and month combination.
+        Builds the (url, filename, file_path) triple for each year and month combination.
 
         Args:
-            context: Dagster context for logging.
+            partition_key: Optional ``YYYY-MM`` monthly partition to restrict the targets to.
+
+        Returns:
+            list[tuple[str, str, str]]: One entry per file to download.
         """
         #  https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024-01.parquet_2023-03.parquet
         base_filename = os.path.basename(self.base_url).split('/')[-1].split('_')[0] + '_' + self.base_url.split('/')[-1].split('_')[1]
+        targets = []
         for year in self.years:
             for month in self.months:
                 modified_url = f"{self.base_url.split('_')[0] + '_' + self.base_url.split('_')[1]}_{year}-{month:02d}.parquet"
                 filename = f"{base_filename}_{year}-{month:02d}.parquet"
                 file_path = os.path.join(self.download_folder, filename)
-                # try:
-                with httpx.Client() as client:
-                    response = client.get(modified_url)
-                    if response.status_code == 200:
-                        with open(file_path, "wb") as file:
-                            file.write(response.content)
-                        context.log.info(f"Download complete: {filename}")
-                    else:
+                targets.append((modified_url, filename, file_path))
+        if partition_key is not None:
+            targets = [target for target in targets if target[1].endswith(partition_file_suffix(partition_key))]
+        return targets
+
+    def download_parquet_data(self, context:AssetExecutionContext, partition_key: str | None = None) -> DownloadSummary:
+        """
+        Downloads Parquet files from a specified URL for each year and month combination.
+
+        Files are fetched through a shared async client (see ``download_concurrently``), one
+        after another unless ``concurrent`` is enabled, in which case up to ``max_concurrency``
+        at a time. Either way 5xx responses and timeouts are retried with exponential backoff.
+        Each file is streamed to ``<file>.part`` in ``chunk_size`` pieces, fsynced and renamed
+        into place, so readers never see a half-written file; an interrupted ``.part`` is
+        resumed with an HTTP Range request guarded by ``If-Range`` on the next attempt. Files
+        already recorded in the download manifest are requested conditionally and skipped when
+        the server answers 304.
+
+        Args:
+            context: Dagster context for logging.
+            partition_key: Optional ``YYYY-MM`` monthly partition; only that month's file is fetched.
+
+        Returns:
+            DownloadSummary: Bytes, throughput and failures for the run.
+        """
+        targets = self.download_targets(partition_key)
+        manifest = self.read_manifest()
+        max_concurrency = self.max_concurrency if self.concurrent else 1
+        summary = asyncio.run(self.download_concurrently(context, targets, manifest, max_concurrency))
+
+        _update_download_manifest(self.download_folder, last_run={
+            "changed": sorted(summary.downloaded),
+            "unchanged": sorted(summary.unchanged),
+            "failed": sorted(summary.failed),
+        }, run_key=partition_key or ALL_PARTITIONS_KEY)
+        return summary
+
+    def read_manifest(self) -> dict:
+        """
+        Read this resource's download manifest, see ``load_download_manifest``.
+
+        Returns:
+            dict: The manifest for ``download_folder``.
+        """
+        return load_download_manifest(self.download_folder)
+
+    def _record_download(self, context, summary, manifest, filename, status_code, written, record) -> bool:
+        """
+        Update the summary and manifest for one finished request.
+
+        Returns:
+            bool: False when ``status_code`` is not a successful or not-modified response.
+        """
+        if status_code == 304:
+            summary.unchanged.append(filename)
+            context.log.info(f"Not modified, skipping: {filename}")
+            return True
+        if status_code not in (200, 206):
+            return False
+
+        summary.bytes_downloaded += written
+        previous = manifest["files"].get(filename)
+        manifest["files"][filename] = record
+        _update_download_manifest(self.download_folder, files={filename: record})
+        if previous and previous.get("sha256") == record["sha256"]:
+            summary.unchanged.append(filename)
+        else:
+            summary.downloaded.append(filename)
+        context.log.info(f"Download complete: {filename}")
+        return True
+
+    async def _astream_to_file(self, client: httpx.AsyncClient, url: str, file_path: str, previous: dict | None = None):
+        """
+        Stream ``url`` into ``file_path`` in ``chunk_size`` pieces, resuming any partial download.
+
+        When the file on disk still matches its ``previous`` manifest record the request is made
+        conditional, and an unchanged file comes back as a bodiless 304. A partial download is
+        only resumed with the ``If-Range`` validator saved when it started, so a file republished
+        in between is downloaded again from byte 0 instead of being appended to the stale bytes.
+        Disk writes, fsync and the final rename run in worker threads, so they never hold up the
+        other downloads on the event loop.
+
+        Returns:
+            tuple[int, int, dict | None]: The response status code, the number of bytes written
+            and the new manifest record for the file.
+        """
+        part_path = file_path + PARTIAL_SUFFIX
+        offset = _resume_offset(part_path)
+        validator = await asyncio.to_thread(_read_validator, part_path) if offset else None
+        if offset and not validator:
+            # Without a validator a resumed range could splice two versions of the file
+            await asyncio.to_thread(_discard_partial, part_path)
+            offset = 0
+        headers = _range_headers(offset, validator) or _conditional_headers(previous, file_path)
+        async with client.stream("GET", url, headers=headers) as response:
+            if _must_restart(response, offset):
+                status_code = None
+            elif response.status_code not in (200, 206):
+                return response.status_code, 0, None
+            else:
+                status_code, written = response.status_code, 0
+                if status_code == 206:
+                    hasher = await asyncio.to_thread(_hash_existing, part_path, self.chunk_size)
+                else:
+                    hasher = hashlib.sha256()
+                file = await asyncio.to_thread(open, part_path, _open_mode(response))
+                if status_code == 200:
+                    await asyncio.to_thread(_write_validator, part_path, _response_validator(response))
+                try:
+                    async for chunk in response.aiter_bytes(self.chunk_size):
+                        await asyncio.to_thread(_write_chunk, file, hasher, chunk)
+                        written += len(chunk)
+                    size = await asyncio.to_thread(_sync_file, file)
+                finally:
+                    await asyncio.to_thread(file.close)
+                record = _manifest_record(url, response, size, hasher.hexdigest())
+        if status_code is None:
+            # The partial file cannot be continued, start again from byte 0
+            await asyncio.to_thread(_discard_partial, part_path)
+            return await self._astream_to_file(client, url, file_path, previous)
+        await asyncio.to_thread(_finalize_download, part_path, file_path)
+        return status_code, written, record
+
+    def create_async_client(self) -> httpx.AsyncClient:
+        """
+        Create the pooled async HTTP client shared by all concurrent downloads.
+
+        Returns:
+            httpx.AsyncClient: Client whose connection pool matches ``max_concurrency``.
+        """
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        return httpx.AsyncClient(limits=limits, timeout=self.timeout, follow_redirects=True)
+
+    async def download_concurrently(self, context:AssetExecutionContext, targets, manifest: dict | None = None, max_concurrency: int | None = None) -> DownloadSummary:
+        """
+        Downloads all targets over one pooled async client, at most ``max_concurrency`` at a time.
+
+        Args:
+            context: Dagster context for logging.
+            targets: (url, filename, file_path) triples from ``download_targets``.
+            manifest: Download manifest used for conditional requests, updated in place.
+            max_concurrency: Downloads in flight at once; the resource's ``max_concurrency`` by default.
+
+        Returns:
+            DownloadSummary: Bytes, throughput and failures for the run.
+        """
+        summary = DownloadSummary()
+        manifest = manifest if manifest is not None else self.read_manifest()
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+        start = time.perf_counter()
+        async with self.create_async_client() as client:
+            await asyncio.gather(*(
+                self._download_with_retries(client, semaphore, context, target, summary, manifest)
+                for target in targets
+            ))
+        summary.elapsed_seconds = time.perf_counter() - start
+        context.log.info(
+            f"Downloaded {len(summary.downloaded)}/{len(targets)} files "
+            f"({len(summary.unchanged)} unchanged), "
+            f"{summary.bytes_downloaded} bytes in {summary.elapsed_seconds:.1f}s "
+            f"({summary.throughput_mb_per_second:.2f} MB/s), {len(summary.failed)} failed"
+        )
+        return summary
+
+    async def _download_with_retries(self, client, semaphore, context, target, summary, manifest):
+        """Fetch a single file, retrying 5xx responses and timeouts with exponential backoff."""
+        modified_url, filename, file_path = target
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                error = None
+                try:
+                    status_code, written, record = await self._astream_to_file(
+                        client, modified_url, file_path, manifest["files"].get(filename)
+                    )
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    error = f"{type(e).__name__}: {e}"
+                else:
+                    if self._record_download(context, summary, manifest, filename, status_code, written, record):
+                        return
+                    if status_code < 500:
+                        summary.failed[filename] = f"Status code: {status_code}"
                         context.log.error(
-                            f"Failed to download {filename}. Status code: {response.status_code}"
+                            f"Failed to download {filename}. Status code: {status_code}"
                         )
+                        return
+                    error = f"Status code: {status_code}"
+
+                if attempt < self.max_retries:
+                    delay = self.backoff_factor * (2 ** attempt)
+                    context.log.info(f"Retrying {filename} in {delay:.1f}s after {error}")
+                    await asyncio.sleep(delay)
+
+            summary.failed[filename] = error
+            context.log.error(f"Failed to download {filename} after {self.max_retries + 1} attempts. {error}")
@@ -1,10 +1,70 @@
-from dagster import ConfigurableResource
+from dagster import ConfigurableResource, AssetExecutionContext
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import time
 import boto3
-from botocore.exceptions import NoCredentialsError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
+
+
+def s3_etag(file_path: str, transfer_config: TransferConfig, chunk_size: int = 1024 * 1024) -> str:
+    """
+    ETag S3 assigns to ``file_path`` when it is uploaded with ``transfer_config``.
+
+    Single-part uploads get the MD5 of the content; multipart uploads get the MD5 of the
+    concatenated part MD5s followed by ``-<part count>``. Objects encrypted with SSE-KMS have
+    other ETags, they simply never compare equal and are uploaded again.
+    """
+    if os.path.getsize(file_path) < transfer_config.multipart_threshold:
+        hasher = hashlib.md5()
+        with open(file_path, "rb") as file:
+            for chunk in iter(lambda: file.read(chunk_size), b""):
+                hasher.update(chunk)
+        return f'"{hasher.hexdigest()}"'
+    part_digests = []
+    with open(file_path, "rb") as file:
+        for part in iter(lambda: file.read(transfer_config.multipart_chunksize), b""):
+            part_digests.append(hashlib.md5(part).digest())
+    return f'"{hashlib.md5(b"".join(part_digests)).hexdigest()}-{len(part_digests)}"'
+
+
+@dataclass
+class UploadSummary:
+    """Per-run statistics for a batch of uploads; ``failed`` maps S3 keys to their last error.
+
+    ``skipped`` holds the keys whose object in the bucket already has the local content.
+    """
+    uploaded: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    failed: dict[str, str] = field(default_factory=dict)
+    bytes_uploaded: int = 0
+    bytes_skipped: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput_mb_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.bytes_uploaded / (1024 * 1024) / self.elapsed_seconds
+
+    def as_metadata(self) -> dict:
+        return {
+            "files_uploaded": len(self.uploaded),
+            "files_skipped": len(self.skipped),
+            "files_failed": len(self.failed),
+            "failed_objects": sorted(self.failed),
+            "bytes_uploaded": self.bytes_uploaded,
+            "bytes_skipped": self.bytes_skipped,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "throughput_mb_per_second": round(self.throughput_mb_per_second, 3),
+        }
 
 
 class ParquetUploadResource(ConfigurableResource):
-    
+
     source_folder: str
     bucket_name: str
     s3_folder: str
@@ -12,11 +72,21 @@ class ParquetUploadResource(ConfigurableResource):
     aws_secret_key: str
     region_name: str
     batch_size: int = 10
+    transfer_concurrency: int = 4
+    multipart_threshold: int = 8 * 1024 * 1024
+    multipart_chunksize: int = 8 * 1024 * 1024
+    max_retries: int = 3
+    backoff_factor: float = 1.0
+    endpoint_url: str | None = None
+    skip_unchanged: bool = True
 
     def create_s3_client(self):
         """
         Create an S3 client using provided credentials.
 
+        The connection pool is sized for ``batch_size`` concurrent objects with up to
+        ``transfer_concurrency`` parts each, so one client can be shared by all upload threads.
+
         Returns:
             boto3.client: Configured S3 client.
         """
@@ -26,6 +96,126 @@ class ParquetUploadResource(ConfigurableResource):
                 aws_access_key_id=self.aws_access_key,
                 aws_secret_access_key=self.aws_secret_key,
                 region_name=self.region_name,
+                endpoint_url=self.endpoint_url,
+                config=Config(max_pool_connections=self.batch_size * self.transfer_concurrency),
             )
         except NoCredentialsError:
             raise Exception("AWS credentials are missing or invalid.")
+
+    def transfer_config(self) -> TransferConfig:
+        """Multipart settings of every upload: files above the threshold go up in parallel parts."""
+        return TransferConfig(
+            multipart_threshold=self.multipart_threshold,
+            multipart_chunksize=self.multipart_chunksize,
+            max_concurrency=self.transfer_concurrency,
+            use_threads=True,
+        )
+
+    def list_remote_objects(self, s3_client) -> dict[str, dict]:
+        """
+        ETag and size of every object under ``s3_folder``, from one paginated listing.
+
+        Returns:
+            dict[str, dict]: ``{"etag", "size"}`` per S3 key.
+        """
+        objects = {}
+        for page in s3_client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket_name, Prefix=self.s3_folder):
+            for obj in page.get("Contents", []):
+                objects[obj["Key"]] = {"etag": obj["ETag"], "size": obj["Size"]}
+        return objects
+
+    def upload_files(self, context: AssetExecutionContext, files: list[str]) -> UploadSummary:
+        """
+        Uploads files of ``source_folder`` to ``s3_folder``, ``batch_size`` objects at a time.
+
+        With ``skip_unchanged`` the prefix is listed once up front and files whose size and
+        expected ETag match the object already in the bucket are not uploaded again.
+
+        All threads share one pooled client. Each file is retried up to ``max_retries`` times
+        with exponential backoff; files that still fail are reported in the summary instead of
+        stopping the others.
+
+        Args:
+            context: Dagster context for logging.
+            files: Paths relative to ``source_folder``; they are also the keys under ``s3_folder``.
+
+        Returns:
+            UploadSummary: Uploaded, skipped and failed objects, bytes and throughput.
+        """
+        summary = UploadSummary()
+        s3_client = self.create_s3_client()
+        transfer_config = self.transfer_config()
+        start = time.perf_counter()
+        remote_objects = {}
+        if self.skip_unchanged:
+            try:
+                remote_objects = self.list_remote_objects(s3_client)
+            except (BotoCoreError, ClientError) as e:
+                # Without a listing every file is uploaded; its own retries report real failures
+                context.log.error(f"Could not list s3://{self.bucket_name}/{self.s3_folder}: {e}")
+        with ThreadPoolExecutor(max_workers=self.batch_size) as executor:
+            outcomes = executor.map(
+                lambda file_name: self._upload_if_changed(context, s3_client, transfer_config, file_name, remote_objects),
+                files,
+            )
+            for s3_key, size, error, skipped in outcomes:
+                if error:
+                    summary.failed[s3_key] = error
+                elif skipped:
+                    summary.skipped.append(s3_key)
+                    summary.bytes_skipped += size
+                else:
+                    summary.uploaded.append(s3_key)
+                    summary.bytes_uploaded += size
+        summary.elapsed_seconds = time.perf_counter() - start
+        context.log.info(
+            f"Uploaded {len(summary.uploaded)}/{len(files)} files to bucket {self.bucket_name} "
+            f"({len(summary.skipped)} unchanged, {summary.bytes_skipped} bytes skipped), "
+            f"{summary.bytes_uploaded} bytes in {summary.elapsed_seconds:.1f}s "
+            f"({summary.throughput_mb_per_second:.2f} MB/s), {len(summary.failed)} failed"
+        )
+        return summary
+
+    def _upload_if_changed(self, context, s3_client, transfer_config, file_name, remote_objects) -> tuple[str, int, str | None, bool]:
+        """
+        Upload a single file unless the bucket already holds an object with the same size and ETag.
+
+        Returns:
+            tuple[str, int, str | None, bool]: The S3 key, its size, the last error if any and
+            whether the upload was skipped.
+        """
+        file_path = os.path.join(self.source_folder, file_name)
+        s3_key = os.path.join(self.s3_folder, file_name)
+        remote = remote_objects.get(s3_key)
+        if remote and os.path.exists(file_path) and remote["size"] == os.path.getsize(file_path):
+            if remote["etag"] == s3_etag(file_path, transfer_config):
+                return s3_key, remote["size"], None, True
+        return (*self._upload_with_retries(context, s3_client, transfer_config, file_name), False)
+
+    def _upload_with_retries(self, context, s3_client, transfer_config, file_name) -> tuple[str, int, str | None]:
+        """
+        Upload a single file, retrying failed transfers with exponential backoff.
+
+        Returns:
+            tuple[str, int, str | None]: The S3 key, the bytes uploaded and the last error, if any.
+        """
+        file_path = os.path.join(self.source_folder, file_name)
+        s3_key = os.path.join(self.s3_folder, file_name)
+        for attempt in range(self.max_retries + 1):
+            try:
+                s3_client.upload_file(file_path, self.bucket_name, s3_key, Config=transfer_config)
+            except (FileNotFoundError, NoCredentialsError) as e:
+                # Retrying cannot fix a missing file or missing credentials
+                error = f"{type(e).__name__}: {e}"
+                break
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                if attempt < self.max_retries:
+                    delay = self.backoff_factor * (2 ** attempt)
+                    context.log.info(f"Retrying {file_name} in {delay:.1f}s after {error}")
+                    time.sleep(delay)
+            else:
+                context.log.info(f"Successfully uploaded {file_name} to S3 bucket {self.bucket_name}.")
+                return s3_key, os.path.getsize(file_path), None
+        context.log.error(f"Failed to upload {file_name}: {error}")
+        return s3_key, 0, error
@@ -2,12 +2,16 @@ BASE_URL = "https://d37ci6vzurychx.cloudfront.net/trip-data/yellow_tripdata_2024
 
 TIME_SLEEP = 1
 
+# Summary engine of the transform: "pandas", "pyarrow", "streaming" or "duckdb"
 PARQUET_ENGINE = "pyarrow"
 
 DOWNLOAD_FOLDER = 'download_data'
 
 STAGING_FOLDER = 'staging_data'
 
+# Arrow IPC files the core assets hand to each other through the arrow_io_manager
+ARROW_IO_FOLDER = 'arrow_data'
+
 MONTHS_TO_DOWNLOAD = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12]
 
 YEARS_TO_DOWNLOAD = [2023,2024]
@@ -19,6 +23,27 @@ COLUMNS_TO_KEEP = [
 'fare_amount', 'tip_amount', 'total_amount', 
 ]
 
+PICKUP_DATETIME_COLUMN = 'tpep_pickup_datetime'
+
+# Subset of COLUMNS_TO_KEEP read by the transform to build the daily summary
+SUMMARY_COLUMNS = [PICKUP_DATETIME_COLUMN, 'passenger_count', 'trip_distance', 'fare_amount']
+
+# Group-by keys added to pickup_date for each rollup the transform can write;
+# pickup_hour is derived from the pickup time, the others are columns of COLUMNS_TO_KEEP
+ROLLUP_GRAINS = {
+    'daily': [],
+    'hourly': ['pickup_hour'],
+    'vendor': ['VendorID'],
+    'payment_type': ['payment_type'],
+    'ratecode': ['RatecodeID'],
+}
+
+ROLLUPS = ['hourly', 'vendor', 'payment_type', 'ratecode']
+
 MAX_WORKERS = 4
 
+MAX_CONCURRENT_DOWNLOADS = 4
+
+DOWNLOAD_MAX_RETRIES = 3
+
 CORE = "core"
\ No newline at end of file
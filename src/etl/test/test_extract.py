@@ -1,7 +1,11 @@
 import os
+import hashlib
+import httpx
 import pytest
 from unittest.mock import MagicMock, patch
-from src.etl.resources.ts_resources import ParquetDownloadResource
+from dagster import materialize
+from src.etl.assets.core.extract import download_parquet_data
+from src.etl.resources.ts_resources import ParquetDownloadResource, load_download_manifest
 
 @pytest.fixture
 def mock_context():
@@ -38,31 +42,309 @@ def test_ensure_download_folder_exists_folder_exists(mock_context, parquet_resou
         mock_context.log.info.assert_called_with(f"Download folder already exists at {parquet_resource.download_folder}")
 
 
-@patch("httpx.Client.get")
-def test_download_parquet_data_success(mock_get, mock_context, parquet_resource):
+def _mock_client(handler):
+    """Patch the resource's client factory so requests hit ``handler`` instead of the network."""
+    return patch.object(
+        ParquetDownloadResource,
+        "create_async_client",
+        lambda self: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+
+
+@pytest.fixture(params=[False, True], ids=["sequential", "concurrent"])
+def download_resource(request, parquet_resource, tmp_path):
+    """Factory of ``parquet_resource`` variants downloading into ``tmp_path``, one by one or concurrently."""
+    def make(**overrides):
+        return ParquetDownloadResource(**{
+            **parquet_resource.model_dump(),
+            "download_folder": str(tmp_path),
+            "concurrent": request.param,
+            "backoff_factor": 0,
+            **overrides,
+        })
+    return make
+
+
+def test_download_parquet_data_success(mock_context, download_resource, tmp_path):
     """Test successful download of Parquet files."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = b"test content"
-    mock_get.return_value = mock_response
+    parquet_resource = download_resource()
+    requests = []
 
-    with patch("builtins.open", new_callable=MagicMock) as mock_open, patch("os.path.join", side_effect=lambda *args: "/".join(args)):
-        parquet_resource.download_parquet_data(mock_context)
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=b"test content")
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context)
 
-        assert mock_get.call_count == len(parquet_resource.years) * len(parquet_resource.months)
-        mock_open.assert_called()
-        mock_context.log.info.assert_any_call("Download complete: yellow_tripdata_2023-01.parquet")
+    assert len(requests) == len(parquet_resource.years) * len(parquet_resource.months)
+    assert sorted(summary.downloaded) == ["yellow_tripdata_2023-01.parquet", "yellow_tripdata_2023-02.parquet"]
+    assert summary.bytes_downloaded == 2 * len(b"test content")
+    assert (tmp_path / "yellow_tripdata_2023-01.parquet").read_bytes() == b"test content"
+    assert not list(tmp_path.glob("*.part"))
+    mock_context.log.info.assert_any_call("Download complete: yellow_tripdata_2023-01.parquet")
 
 
-@patch("httpx.Client.get")
-def test_download_parquet_data_failure(mock_get, mock_context, parquet_resource):
+def test_download_parquet_data_failure(mock_context, download_resource, tmp_path):
     """Test failure to download Parquet files."""
-    mock_response = MagicMock()
-    mock_response.status_code = 404
-    mock_get.return_value = mock_response
+    parquet_resource = download_resource()
+    requests = []
 
-    with patch("os.path.join", side_effect=lambda *args: "/".join(args)):
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(404)
+
+    with _mock_client(handler):
         parquet_resource.download_parquet_data(mock_context)
 
-        assert mock_get.call_count == len(parquet_resource.years) * len(parquet_resource.months)
-        mock_context.log.error.assert_any_call("Failed to download yellow_tripdata_2023-01.parquet. Status code: 404")
\ No newline at end of file
+    assert len(requests) == len(parquet_resource.years) * len(parquet_resource.months)
+    assert not list(tmp_path.glob("*.parquet*"))
+    mock_context.log.error.assert_any_call("Failed to download yellow_tripdata_2023-01.parquet. Status code: 404")
+
+
+def test_download_parquet_data_resumes_partial_file(mock_context, download_resource, tmp_path):
+    """Test that an interrupted download is resumed with a Range request."""
+    parquet_resource = download_resource(months=[1], chunk_size=4)
+    content = b"0123456789abcdef"
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part").write_bytes(content[:6])
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part.validator").write_text('"v1"')
+    range_headers = []
+
+    def handler(request):
+        range_headers.append((request.headers.get("Range"), request.headers.get("If-Range")))
+        return httpx.Response(
+            206, content=content[6:], headers={"Content-Range": f"bytes 6-15/{len(content)}", "ETag": '"v1"'},
+        )
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context)
+
+    assert range_headers == [("bytes=6-", '"v1"')]
+    assert summary.bytes_downloaded == len(content) - 6
+    assert (tmp_path / "yellow_tripdata_2023-01.parquet").read_bytes() == content
+    assert not (tmp_path / "yellow_tripdata_2023-01.parquet.part").exists()
+    assert not (tmp_path / "yellow_tripdata_2023-01.parquet.part.validator").exists()
+
+
+def test_download_parquet_data_restarts_when_file_changed_mid_resume(mock_context, download_resource, tmp_path):
+    """Test that a file republished since the partial download started is downloaded whole again."""
+    parquet_resource = download_resource(months=[1])
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part").write_bytes(b"old-version-")
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part.validator").write_text('"v1"')
+    requests = []
+
+    def handler(request):
+        requests.append((request.headers.get("Range"), request.headers.get("If-Range")))
+        # The If-Range validator no longer matches, so the server ignores the Range header
+        return httpx.Response(200, content=b"new version", headers={"ETag": '"v2"'})
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context)
+
+    assert requests == [("bytes=12-", '"v1"')]
+    assert summary.downloaded == ["yellow_tripdata_2023-01.parquet"]
+    assert (tmp_path / "yellow_tripdata_2023-01.parquet").read_bytes() == b"new version"
+    assert not list(tmp_path.glob("*.part*"))
+    record = load_download_manifest(str(tmp_path))["files"]["yellow_tripdata_2023-01.parquet"]
+    assert record["etag"] == '"v2"'
+    assert record["sha256"] == hashlib.sha256(b"new version").hexdigest()
+
+
+def test_download_parquet_data_discards_partial_file_without_validator(mock_context, download_resource, tmp_path):
+    """Test that a partial download with no saved validator is not resumed blindly."""
+    parquet_resource = download_resource(months=[1])
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part").write_bytes(b"unknown origin")
+    range_headers = []
+
+    def handler(request):
+        range_headers.append(request.headers.get("Range"))
+        return httpx.Response(200, content=b"fresh")
+
+    with _mock_client(handler):
+        parquet_resource.download_parquet_data(mock_context)
+
+    assert range_headers == [None]
+    assert (tmp_path / "yellow_tripdata_2023-01.parquet").read_bytes() == b"fresh"
+
+
+def test_download_parquet_data_restarts_unresumable_partial_file(mock_context, download_resource, tmp_path):
+    """Test that a partial file the server cannot continue is discarded and downloaded again."""
+    parquet_resource = download_resource(months=[1])
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part").write_bytes(b"stale partial data")
+    (tmp_path / "yellow_tripdata_2023-01.parquet.part.validator").write_text("Sun, 01 Jan 2023 00:00:00 GMT")
+    range_headers = []
+
+    def handler(request):
+        range_headers.append(request.headers.get("Range"))
+        if "Range" in request.headers:
+            return httpx.Response(416)
+        return httpx.Response(200, content=b"fresh")
+
+    with _mock_client(handler):
+        parquet_resource.download_parquet_data(mock_context)
+
+    assert range_headers == ["bytes=18-", None]
+    assert (tmp_path / "yellow_tripdata_2023-01.parquet").read_bytes() == b"fresh"
+
+
+def test_download_parquet_data_skips_unchanged_files(mock_context, download_resource, tmp_path):
+    """Test that a second run sends conditional requests and skips files answered with 304."""
+    parquet_resource = download_resource()
+    validators = []
+
+    def handler(request):
+        validators.append((request.headers.get("If-None-Match"), request.headers.get("If-Modified-Since")))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            content=b"test content",
+            headers={"ETag": '"v1"', "Last-Modified": "Sun, 01 Jan 2023 00:00:00 GMT"},
+        )
+
+    with _mock_client(handler):
+        first = parquet_resource.download_parquet_data(mock_context)
+        second = parquet_resource.download_parquet_data(mock_context)
+
+    assert sorted(first.downloaded) == ["yellow_tripdata_2023-01.parquet", "yellow_tripdata_2023-02.parquet"]
+    assert second.downloaded == []
+    assert sorted(second.unchanged) == ["yellow_tripdata_2023-01.parquet", "yellow_tripdata_2023-02.parquet"]
+    assert validators[2:] == [('"v1"', "Sun, 01 Jan 2023 00:00:00 GMT")] * 2
+    mock_context.log.info.assert_any_call("Not modified, skipping: yellow_tripdata_2023-01.parquet")
+
+    manifest = load_download_manifest(str(tmp_path))
+    record = manifest["files"]["yellow_tripdata_2023-01.parquet"]
+    assert record["etag"] == '"v1"'
+    assert record["size"] == len(b"test content")
+    assert record["sha256"] == hashlib.sha256(b"test content").hexdigest()
+    assert manifest["last_run"]["__all__"]["changed"] == []
+
+
+def test_download_parquet_data_detects_changes_by_hash(mock_context, download_resource, tmp_path):
+    """Test that servers without validators still only report files whose content changed."""
+    parquet_resource = download_resource()
+    contents = {"01": b"same", "02": b"before"}
+
+    def handler(request):
+        return httpx.Response(200, content=contents[request.url.path[-10:-8]])
+
+    with _mock_client(handler):
+        parquet_resource.download_parquet_data(mock_context)
+        contents["02"] = b"after"
+        summary = parquet_resource.download_parquet_data(mock_context)
+
+    assert summary.downloaded == ["yellow_tripdata_2023-02.parquet"]
+    assert summary.unchanged == ["yellow_tripdata_2023-01.parquet"]
+    assert load_download_manifest(str(tmp_path))["last_run"]["__all__"]["changed"] == ["yellow_tripdata_2023-02.parquet"]
+
+
+def test_download_parquet_data_retries_server_errors(mock_context, download_resource, tmp_path):
+    """Test that 5xx responses and timeouts are retried until the file downloads."""
+    parquet_resource = download_resource(months=[1, 2, 3], max_retries=2)
+    attempts = {}
+
+    def handler(request):
+        attempts[request.url.path] = attempts.get(request.url.path, 0) + 1
+        if attempts[request.url.path] == 1:
+            raise httpx.ReadTimeout("timed out", request=request)
+        if attempts[request.url.path] == 2:
+            return httpx.Response(503)
+        return httpx.Response(200, content=b"ok")
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context)
+
+    assert len(summary.downloaded) == 3
+    assert summary.failed == {}
+    assert set(attempts.values()) == {3}
+    assert not list(tmp_path.glob("*.part"))
+
+
+@pytest.mark.parametrize("download_resource", [False], indirect=True, ids=["sequential"])
+def test_download_parquet_data_sequential_downloads_one_file_at_a_time(mock_context, download_resource):
+    """Test that sequential mode only requests the next file once the previous one, retries included, is done."""
+    parquet_resource = download_resource(max_retries=2)
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        if requests.count(request.url.path) == 1:
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200, content=b"ok")
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context)
+
+    assert sorted(summary.downloaded) == ["yellow_tripdata_2023-01.parquet", "yellow_tripdata_2023-02.parquet"]
+    assert requests == ["/trip-data/yellow_tripdata_2023-01.parquet"] * 2 + ["/trip-data/yellow_tripdata_2023-02.parquet"] * 2
+
+
+def test_download_parquet_data_failures(mock_context, download_resource):
+    """Test that client errors fail fast and exhausted retries are reported."""
+    parquet_resource = download_resource(months=[1, 2, 3], max_retries=1)
+    attempts = {}
+
+    def handler(request):
+        attempts[request.url.path] = attempts.get(request.url.path, 0) + 1
+        if request.url.path.endswith("01.parquet"):
+            return httpx.Response(404)
+        if request.url.path.endswith("02.parquet"):
+            return httpx.Response(500)
+        return httpx.Response(200, content=b"ok")
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context)
+
+    assert summary.downloaded == ["yellow_tripdata_2023-03.parquet"]
+    assert summary.failed == {
+        "yellow_tripdata_2023-01.parquet": "Status code: 404",
+        "yellow_tripdata_2023-02.parquet": "Status code: 500",
+    }
+    assert attempts["/trip-data/yellow_tripdata_2023-01.parquet"] == 1
+    assert attempts["/trip-data/yellow_tripdata_2023-02.parquet"] == 2
+    mock_context.log.error.assert_any_call("Failed to download yellow_tripdata_2023-01.parquet. Status code: 404")
+
+
+def test_download_parquet_data_partition(mock_context, download_resource):
+    """Test that a monthly partition only downloads its own file."""
+    parquet_resource = download_resource(years=[2023, 2024])
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.path)
+        return httpx.Response(200, content=b"ok")
+
+    with _mock_client(handler):
+        summary = parquet_resource.download_parquet_data(mock_context, "2024-02")
+
+    assert requested == ["/trip-data/yellow_tripdata_2024-02.parquet"]
+    assert summary.downloaded == ["yellow_tripdata_2024-02.parquet"]
+
+
+def test_download_parquet_data_last_run_per_partition(mock_context, download_resource, tmp_path):
+    """Test that partition runs keep their own last_run entry instead of overwriting each other's."""
+    parquet_resource = download_resource()
+
+    with _mock_client(lambda request: httpx.Response(200, content=b"ok")):
+        parquet_resource.download_parquet_data(mock_context, "2023-01")
+        parquet_resource.download_parquet_data(mock_context, "2023-02")
+
+    last_run = load_download_manifest(str(tmp_path))["last_run"]
+    assert last_run["2023-01"]["changed"] == ["yellow_tripdata_2023-01.parquet"]
+    assert last_run["2023-02"]["changed"] == ["yellow_tripdata_2023-02.parquet"]
+
+
+def test_download_parquet_data_asset_fails_partition_run(download_resource):
+    """Test that a month whose download fails fails its partition run instead of materializing."""
+    with _mock_client(lambda request: httpx.Response(404)):
+        result = materialize(
+            [download_parquet_data],
+            partition_key="2023-01",
+            resources={"download_resource": download_resource()},
+            raise_on_error=False,
+        )
+
+    assert not result.success
+    failure = result.failure_data_for_node("download_parquet_data")
+    assert "1 files failed to download" in failure.error.message
+    assert result.get_asset_materialization_events() == []
@@ -0,0 +1,48 @@
+import datetime
+import pyarrow as pa
+import pytest
+from dagster import AssetKey, build_input_context, build_output_context
+from src.etl.resources.io_manager import ArrowIPCIOManager
+
+
+@pytest.fixture
+def summary():
+    """Fixture for a small daily summary table."""
+    return pa.table({
+        "uuid": ["a", "b"],
+        "pickup_date": pa.array([datetime.date(2023, 1, 1), datetime.date(2023, 1, 2)], pa.date32()),
+        "total_fare": [10.0, 20.0],
+    })
+
+
+def test_arrow_io_manager_round_trip(summary, tmp_path):
+    """Test that a partitioned output is written as Arrow IPC and memory-mapped back without copying."""
+    io_manager = ArrowIPCIOManager(base_dir=str(tmp_path))
+    asset_key = AssetKey(["transform_parquet_files"])
+
+    output_context = build_output_context(asset_key=asset_key, partition_key="2023-01")
+    io_manager.handle_output(output_context, summary)
+
+    path = tmp_path / "transform_parquet_files" / "2023-01.arrow"
+    assert path.exists()
+    assert not (tmp_path / "transform_parquet_files" / "2023-01.arrow.tmp").exists()
+
+    allocated = pa.total_allocated_bytes()
+    input_context = build_input_context(asset_key=asset_key, partition_key="2023-01")
+    loaded = io_manager.load_input(input_context)
+
+    assert loaded.equals(summary)
+    # The table points into the memory map instead of freshly allocated buffers
+    assert pa.total_allocated_bytes() == allocated
+
+
+def test_arrow_io_manager_partitions_are_separate(summary, tmp_path):
+    """Test that every partition gets its own file."""
+    io_manager = ArrowIPCIOManager(base_dir=str(tmp_path))
+    asset_key = AssetKey(["transform_parquet_files"])
+
+    io_manager.handle_output(build_output_context(asset_key=asset_key, partition_key="2023-01"), summary)
+    io_manager.handle_output(build_output_context(asset_key=asset_key, partition_key="2023-02"), summary.slice(0, 1))
+
+    loaded = io_manager.load_input(build_input_context(asset_key=asset_key, partition_key="2023-02"))
+    assert loaded.num_rows == 1
@@ -1,9 +1,11 @@
 import os
 import pytest
 import pandas as pd
-from unittest.mock import MagicMock, patch, call
-from psycopg2 import connect
-from src.etl.resources.load_resource import ParquetPostgresLoader
+import pyarrow as pa
+from datetime import date
+from unittest.mock import MagicMock, patch
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from src.etl.resources.load_resource import ParquetPostgresLoader, file_sha256
 from dagster import AssetExecutionContext
 
 # test_load_resource.py
@@ -35,6 +37,15 @@ def test_connection_postgres(mock_connect, loader, mock_context):
     loader.connect(mock_context)
     mock_context.log.error.assert_called_with("Connection error")
 
+@patch("psycopg2.connect")
+def test_connect_returns_new_connection(mock_connect, loader, mock_context):
+    """Test that connect hands the connection to the caller instead of storing it on the resource."""
+    conn = loader.connect(mock_context)
+
+    assert conn is mock_connect.return_value
+    assert "conn" not in vars(loader)
+    mock_context.log.info.assert_called_with("Connection success: test_user")
+
 @patch("glob.glob")
 @patch("pandas.read_parquet")
 @patch("psycopg2.connect")
@@ -52,6 +63,7 @@ def test_load_parquet_files_success(mock_connect, mock_read_parquet, mock_glob,
         "avg_fare_amount": [12.5],
     })
     mock_conn = MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (1, 0, 1)
     mock_connect.return_value = mock_conn
 
     loader.load_parquet_files(mock_context)
@@ -92,4 +104,342 @@ def test_load_parquet_files_no_files(mock_connect, mock_read_parquet, mock_glob,
 
     loader.load_parquet_files(mock_context)
 
-    mock_context.log.info.assert_called_with("No Parquet files found in directory: /tmp/parquet_files")
\ No newline at end of file
+    mock_context.log.info.assert_called_with("No Parquet files found in directory: /tmp/parquet_files")
+
+
+@patch("glob.glob")
+@patch("psycopg2.connect")
+def test_load_parquet_files_partition(mock_connect, mock_glob, loader, mock_context):
+    """Test that a monthly partition only looks for the summary of that month."""
+    mock_glob.return_value = []
+    mock_connect.return_value = MagicMock()
+
+    loader.load_parquet_files(mock_context, "2023-01")
+
+    mock_glob.assert_called_once_with("/tmp/parquet_files/daily/year=2023/month=01/*.parquet")
+
+
+@patch("pandas.read_parquet")
+@patch("psycopg2.connect")
+def test_load_summary_table(mock_connect, mock_read_parquet, loader, mock_context):
+    """Test that a summary handed over as an Arrow table is upserted without reading Parquet files."""
+    summary = pa.table({
+        "uuid": ["123", "456"],
+        "pickup_date": pa.array([date(2023, 1, 1), date(2023, 1, 2)], pa.date32()),
+        "total_passenger_count": [2, 3],
+        "total_distance": [10.5, 3.0],
+        "total_fare": [25.0, 9.0],
+        "avg_trip_distance": [5.25, 1.0],
+        "avg_fare_amount": [12.5, 3.0],
+    })
+    mock_conn = MagicMock()
+    mock_conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (1, 0, 1)
+    mock_connect.return_value = mock_conn
+
+    loader.load_summary_table(mock_context, summary)
+
+    mock_read_parquet.assert_not_called()
+    # The partition lookup, then the staging table and the merge
+    assert mock_conn.cursor.return_value.__enter__.return_value.execute.call_count == 3
+    assert mock_conn.commit.call_count == 2
+    mock_context.log.info.assert_any_call("Loaded 2 summary rows.")
+
+
+@patch("glob.glob")
+@patch("pandas.read_parquet")
+@patch("psycopg2.connect")
+def test_load_parquet_files_copy_mode(mock_connect, mock_read_parquet, mock_glob, loader, mock_context):
+    """Test that copy mode streams the file as CSV into a staging table and merges it with one statement."""
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "load_mode": "copy"})
+    mock_glob.return_value = ["/tmp/parquet_files/file1.parquet"]
+    mock_read_parquet.return_value = pd.DataFrame({
+        "uuid": ["123", "456"],
+        "pickup_date": ["2023-01-01", "2023-01-02"],
+        "total_passenger_count": [2, 3],
+        "total_distance": [10.5, 3.0],
+        "total_fare": [25.0, 9.0],
+        "avg_trip_distance": [5.25, None],
+        "avg_fare_amount": [12.5, 3.0],
+    })
+    mock_conn = MagicMock()
+    mock_connect.return_value = mock_conn
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    copied = []
+    cursor.copy_expert.side_effect = lambda sql, buffer: copied.append(buffer.read().decode())
+    # Two rows staged, one of them already stored; both written
+    cursor.fetchone.return_value = (2, 1, 2)
+
+    results = loader.load_parquet_files(mock_context)
+
+    statements = [c.args[0] for c in cursor.execute.call_args_list]
+    assert len(statements) == 2
+    assert "CREATE TEMP TABLE trip_summary_staging" in statements[0]
+    assert "ON CONFLICT (uuid, pickup_date) DO UPDATE" in statements[1]
+    assert "IS DISTINCT FROM" in statements[1]
+    assert (results[0].inserted, results[0].updated, results[0].unchanged) == (1, 1, 0)
+    assert cursor.copy_expert.call_args.args[0].startswith("COPY trip_summary_staging (uuid, pickup_date,")
+    # Nulls are unquoted empty fields, which COPY reads as NULL; the file has no count columns
+    assert copied == ['"123",2023-01-01,2,10.5,25,5.25,12.5,,\n"456",2023-01-02,3,3,9,,3,,\n']
+    mock_conn.commit.assert_called_once()
+
+
+def test_unknown_load_mode(loader, mock_context):
+    """Test that an unknown load mode is rejected before connecting."""
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "load_mode": "bulk"})
+    with pytest.raises(ValueError, match="Unknown load mode 'bulk'"):
+        loader.load_parquet_files(mock_context)
+
+
+@patch("glob.glob")
+@patch("pandas.read_parquet")
+@patch("psycopg2.connect")
+def test_load_parquet_files_pooled(mock_connect, mock_read_parquet, mock_glob, loader, mock_context):
+    """Test that files load on pooled connections in their own transactions and the pool is closed."""
+    files = [f"/tmp/parquet_files/daily/year=2023/month={month:02d}/summary.parquet" for month in range(1, 13)]
+    mock_glob.return_value = files
+    mock_read_parquet.return_value = pd.DataFrame({
+        "uuid": ["123"],
+        "pickup_date": ["2023-01-01"],
+        "total_passenger_count": [2],
+        "total_distance": [10.5],
+        "total_fare": [25.0],
+        "avg_trip_distance": [5.25],
+        "avg_fare_amount": [12.5],
+    })
+    connections = []
+
+    def fake_connect(**kwargs):
+        conn = MagicMock(closed=0)
+        conn.info.transaction_status = TRANSACTION_STATUS_IDLE
+        conn.cursor.return_value.__enter__.return_value.fetchone.return_value = (1, 0, 1)
+        conn.cursor.return_value.__enter__.return_value.execute.side_effect = (
+            lambda sql, params: (_ for _ in ()).throw(RuntimeError("deadlock")) if files[4] in str(params) else None
+        )
+        connections.append(conn)
+        return conn
+
+    mock_connect.side_effect = fake_connect
+    mock_read_parquet.side_effect = lambda path: mock_read_parquet.return_value.assign(uuid=[path])
+
+    results = loader.load_parquet_files(mock_context)
+
+    assert [result.file_path for result in results] == files
+    assert [result.rows for result in results] == [1] * 4 + [0] + [1] * 7
+    assert results[4].error == "RuntimeError: deadlock"
+    assert len(connections) == loader.pool_size
+    # One commit per loaded file, plus the partition check before the loads
+    assert sum(conn.commit.call_count for conn in connections) == 12
+    assert sum(conn.rollback.call_count for conn in connections) == 1
+    assert all(conn.close.called for conn in connections)
+    mock_context.log.info.assert_any_call("Loaded 11 rows from 11/12 files.")
+
+
+def _write_summary_month(folder, month):
+    path = os.path.join(folder, "daily", "year=2023", f"month={month:02d}", "summary.parquet")
+    os.makedirs(os.path.dirname(path))
+    pd.DataFrame({
+        "uuid": [f"uuid-{month}"],
+        "pickup_date": [date(2023, month, 1)],
+        "total_passenger_count": [2],
+        "total_distance": [10.5],
+        "total_fare": [25.0],
+        "avg_trip_distance": [5.25],
+        "avg_fare_amount": [12.5],
+    }).to_parquet(path)
+    return path
+
+
+@patch("psycopg2.connect")
+def test_load_parquet_files_ledger(mock_connect, loader, mock_context, tmp_path):
+    """Test that recorded files are skipped and loaded files are recorded before their commit."""
+    january = _write_summary_month(str(tmp_path), 1)
+    february = _write_summary_month(str(tmp_path), 2)
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "output_folder": str(tmp_path), "use_ledger": True})
+    statements = []
+    mock_conn = MagicMock(closed=0)
+    mock_conn.info.transaction_status = TRANSACTION_STATUS_IDLE
+    mock_conn.commit.side_effect = lambda: statements.append(("COMMIT", None))
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = lambda sql, params=None: statements.append((sql, params))
+    cursor.fetchall.side_effect = [[], [("daily/year=2023/month=01/summary.parquet", file_sha256(january))]]
+    cursor.fetchone.return_value = (1, 0, 1)
+    mock_connect.return_value = mock_conn
+
+    results = loader.load_parquet_files(mock_context)
+
+    assert [(result.skipped, result.rows) for result in results] == [(True, 0), (False, 1)]
+    assert "to_regclass" in statements[0][0]
+    assert statements[0][1] == (["trip_summary_y2023m01", "trip_summary_y2023m02"],)
+    assert "FROM load_ledger" in statements[2][0]
+    # The ledger entry is written in the transaction of the rows it records
+    assert "INSERT INTO load_ledger" in statements[-2][0]
+    assert statements[-2][1] == ("daily/year=2023/month=02/summary.parquet", file_sha256(february), 1)
+    assert statements[-1][0] == "COMMIT"
+    mock_context.log.info.assert_any_call("Loaded 1 rows from 1/2 files.")
+
+
+def _refresh_connections(mock_connect, statements):
+    """Makes every pooled connection log its statements and commits to ``statements`` through one shared cursor."""
+    cursor = MagicMock()
+    cursor.execute.side_effect = lambda sql, params=None: statements.append(str(sql))
+
+    def fake_connect(**kwargs):
+        conn = MagicMock(closed=0)
+        conn.info.transaction_status = TRANSACTION_STATUS_IDLE
+        conn.commit.side_effect = lambda: statements.append("COMMIT")
+        conn.cursor.return_value.__enter__.return_value = cursor
+        return conn
+
+    mock_connect.side_effect = fake_connect
+    return cursor
+
+
+@patch("psycopg2.connect")
+def test_load_parquet_files_full_refresh(mock_connect, loader, mock_context, tmp_path):
+    """Test that a full refresh fills and indexes the shadow table before swapping it in with the new ledger."""
+    _write_summary_month(str(tmp_path), 1)
+    _write_summary_month(str(tmp_path), 2)
+    loader = ParquetPostgresLoader(**{
+        **loader.model_dump(), "output_folder": str(tmp_path), "full_refresh": True, "use_ledger": True,
+    })
+    statements = []
+    cursor = _refresh_connections(mock_connect, statements)
+    # The refresh lock, then the shadow and live row counts
+    cursor.fetchone.side_effect = [(True,), (2, 3)]
+    cursor.fetchall.return_value = [("trip_summary_shadow", "p"), ("trip_summary_shadow_y2023m01_pkey", "i")]
+
+    results = loader.load_parquet_files(mock_context)
+
+    assert [result.rows for result in results] == [1, 1]
+    assert [c.args[0] for c in cursor.copy_expert.call_args_list] == [
+        "COPY trip_summary_shadow (uuid, pickup_date, total_passenger_count, total_distance, total_fare, "
+        "avg_trip_distance, avg_fare_amount, distance_count, fare_count) FROM STDIN WITH (FORMAT csv)",
+    ] * 2
+    assert any("ADD PRIMARY KEY" in statement for statement in statements)
+    swap = statements.index("DROP TABLE trip_summary")
+    assert "Identifier('trip_summary_y2023m01_pkey')" in statements[swap + 2]
+    assert statements[swap + 3] == "DELETE FROM load_ledger"
+    assert ["INSERT INTO load_ledger" in statement for statement in statements[swap + 4:swap + 7]] == [True, True, False]
+    assert statements[swap + 6] == "COMMIT"
+    assert statements[-3:] == ["DROP TABLE IF EXISTS trip_summary_shadow", "SELECT pg_advisory_unlock(%s)", "COMMIT"]
+
+
+@patch("psycopg2.connect")
+def test_load_parquet_files_full_refresh_validation(mock_connect, loader, mock_context, tmp_path):
+    """Test that a shadow table much smaller than the live one is dropped without touching the live table."""
+    january = _write_summary_month(str(tmp_path), 1)
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "output_folder": str(tmp_path), "full_refresh": True})
+    statements = []
+    cursor = _refresh_connections(mock_connect, statements)
+    cursor.fetchone.side_effect = [(True,), (1, 10)]
+
+    with pytest.raises(ValueError, match="less than 50%"):
+        loader.load_parquet_files(mock_context)
+    with pytest.raises(ValueError, match="single partition"):
+        loader.load_parquet_files(mock_context, "2023-01")
+    with pytest.raises(ValueError, match="use load_parquet_files"):
+        loader.load_summary_table(mock_context, pa.Table.from_pandas(pd.read_parquet(january)), "2023-01")
+
+    assert "DROP TABLE trip_summary" not in statements
+    assert statements[-3:] == ["DROP TABLE IF EXISTS trip_summary_shadow", "SELECT pg_advisory_unlock(%s)", "COMMIT"]
+
+
+@patch("psycopg2.connect")
+def test_load_summary_table_ledger_skip(mock_connect, loader, mock_context, tmp_path):
+    """Test that a month whose summary file is already recorded is not written again, on the resource's pooled connection."""
+    january = _write_summary_month(str(tmp_path), 1)
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "output_folder": str(tmp_path), "use_ledger": True})
+    mock_conn = MagicMock(closed=0)
+    mock_conn.info.transaction_status = TRANSACTION_STATUS_IDLE
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    cursor.fetchall.side_effect = [[], [("daily/year=2023/month=01/summary.parquet", file_sha256(january))]] * 2
+    mock_connect.return_value = mock_conn
+
+    results = [
+        loader.load_summary_table(mock_context, pa.Table.from_pandas(pd.read_parquet(january)), "2023-01")
+        for _ in range(2)
+    ]
+
+    assert all(result.skipped for result in results)
+    assert cursor.execute.call_count == 4
+    cursor.copy_expert.assert_not_called()
+    # Both loads reuse the connection, which is closed with the resource
+    mock_connect.assert_called_once()
+    mock_conn.close.assert_not_called()
+    loader.teardown_after_execution(None)
+    mock_conn.close.assert_called_once()
+
+
+@patch("psycopg2.connect")
+def test_load_summary_table_refreshes_rollups(mock_connect, loader, mock_context):
+    """Test that the touched weekly and monthly periods are refreshed under the rollup lock before the commit."""
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "load_mode": "copy", "maintain_rollups": True})
+    summary = pa.table({
+        "uuid": ["123", "456"],
+        "pickup_date": pa.array([date(2023, 1, 31), date(2023, 2, 1)], pa.date32()),
+        "total_passenger_count": [2, 3],
+        "total_distance": [10.5, 3.0],
+        "total_fare": [25.0, 9.0],
+        "avg_trip_distance": [5.25, 1.0],
+        "avg_fare_amount": [12.5, 3.0],
+        "distance_count": [2, 3],
+        "fare_count": [2, 3],
+    })
+    statements = []
+    mock_conn = MagicMock()
+    mock_conn.commit.side_effect = lambda: statements.append(("COMMIT", None))
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    cursor.execute.side_effect = lambda sql, params=None: statements.append((sql, params))
+    cursor.fetchone.return_value = (2, 0, 2)
+    mock_connect.return_value = mock_conn
+
+    loader.load_summary_table(mock_context, summary)
+
+    assert statements[-4][0] == "SELECT pg_advisory_xact_lock(%s)"
+    weekly, monthly = statements[-3], statements[-2]
+    assert "INSERT INTO trip_summary_weekly" in weekly[0]
+    # Both days fall in the week starting on Monday 2023-01-30
+    assert weekly[1]["periods"] == [date(2023, 1, 30)]
+    assert "INSERT INTO trip_summary_monthly" in monthly[0]
+    assert monthly[1]["periods"] == [date(2023, 1, 1), date(2023, 2, 1)]
+    assert statements[-1][0] == "COMMIT"
+
+
+@patch("pandas.read_parquet")
+@patch("glob.glob")
+@patch("psycopg2.connect")
+def test_load_parquet_files_counts_unchanged_rows(mock_connect, mock_glob, mock_read_parquet, loader, mock_context):
+    """Test that rows mode tells inserts, updates and unchanged rows apart and skips rollups without writes."""
+    loader = ParquetPostgresLoader(**{**loader.model_dump(), "maintain_rollups": True})
+    mock_glob.return_value = ["/tmp/parquet_files/file1.parquet"]
+    mock_read_parquet.return_value = pd.DataFrame({
+        "uuid": ["1", "2", "3"],
+        "pickup_date": ["2023-01-01", "2023-01-02", "2023-01-03"],
+        "total_passenger_count": [2, 3, 4],
+        "total_distance": [10.5, 3.0, 1.0],
+        "total_fare": [25.0, 9.0, 5.0],
+        "avg_trip_distance": [5.25, 1.0, 1.0],
+        "avg_fare_amount": [12.5, 3.0, 5.0],
+        "distance_count": [2, 3, 1],
+        "fare_count": [2, 3, 1],
+    })
+    mock_conn = MagicMock()
+    mock_connect.return_value = mock_conn
+    cursor = mock_conn.cursor.return_value.__enter__.return_value
+    # (rows, existing, written) of each row's upsert: a new row, a changed one and an identical one
+    cursor.fetchone.side_effect = [(1, 0, 1), (1, 1, 1), (1, 1, 0)]
+
+    results = loader.load_parquet_files(mock_context)
+
+    assert (results[0].inserted, results[0].updated, results[0].unchanged) == (1, 1, 1)
+    upserts = [c.args[0] for c in cursor.execute.call_args_list if "LEFT JOIN trip_summary_y2023m01 AS stored" in c.args[0]]
+    assert len(upserts) == 3 and all("IS DISTINCT FROM" in sql for sql in upserts)
+    mock_context.log.info.assert_any_call("1 rows inserted, 1 updated, 1 unchanged.")
+
+    # A re-load of identical rows writes nothing, so the rollups are left alone
+    cursor.reset_mock()
+    cursor.fetchone.side_effect = [(1, 1, 0)] * 3
+    results = loader.load_parquet_files(mock_context)
+
+    assert results[0].unchanged == 3
+    assert not any("pg_advisory_xact_lock" in c.args[0] for c in cursor.execute.call_args_list)
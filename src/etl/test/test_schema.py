@@ -0,0 +1,101 @@
+import datetime
+from unittest.mock import MagicMock
+from psycopg2 import sql
+from src.etl.utils.database_operation.schema import (
+    SCHEMA_LOCK_ID,
+    SCHEMA_MIGRATIONS,
+    _create_month_partition,
+    ensure_month_partitions,
+    migrate,
+    rollup_period_start,
+    swap_shadow_table,
+)
+
+
+def _cursor(conn):
+    return conn.cursor.return_value.__enter__.return_value
+
+
+def test_month_partition_bounds():
+    """Test that a December partition ends on the first day of the next year."""
+    cur = MagicMock()
+    _create_month_partition(cur, 2023, 12)
+
+    statement = cur.execute.call_args.args[0]
+    assert [part.strings for part in statement.seq if isinstance(part, sql.Identifier)] == [
+        ("trip_summary_y2023m12",), ("trip_summary",),
+    ]
+    assert [part.wrapped for part in statement.seq if isinstance(part, sql.Literal)] == ["2023-12-01", "2024-01-01"]
+
+
+def test_migrate_applies_pending_versions_only():
+    """Test that applied migrations are skipped and the rest are recorded under the advisory lock."""
+    conn = MagicMock()
+    cur = _cursor(conn)
+    cur.fetchone.return_value = (1,)
+
+    applied = migrate(conn)
+
+    statements = [c.args for c in cur.execute.call_args_list]
+    assert applied == [version for version, _, _ in SCHEMA_MIGRATIONS[1:]]
+    assert statements[0] == ("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+    assert not any("trip_summary_legacy" in str(statement[0]) for statement in statements)
+    assert statements[-1][1] == (SCHEMA_MIGRATIONS[-1][0], SCHEMA_MIGRATIONS[-1][1])
+    conn.commit.assert_called_once()
+
+
+def test_ensure_month_partitions_creates_missing_only():
+    """Test that only partitions missing from the catalog are created."""
+    conn = MagicMock()
+    cur = _cursor(conn)
+    cur.fetchall.return_value = [("trip_summary_y2023m02",)]
+
+    created = ensure_month_partitions(conn, [(2023, 1), (2023, 2), (2023, 1)])
+
+    assert created == ["trip_summary_y2023m02"]
+    assert cur.execute.call_args_list[0].args[1] == (["trip_summary_y2023m01", "trip_summary_y2023m02"],)
+    assert cur.execute.call_count == 3
+    conn.commit.assert_called_once()
+
+
+def test_ensure_month_partitions_without_months():
+    """Test that nothing is queried when no month is loaded."""
+    conn = MagicMock()
+    assert ensure_month_partitions(conn, []) == []
+    conn.cursor.assert_not_called()
+
+
+def test_rollup_period_start():
+    """Test that periods start on ISO Mondays and on the first of the month, like date_trunc."""
+    sunday = datetime.date(2023, 1, 1)
+    assert rollup_period_start(sunday, "week") == datetime.date(2022, 12, 26)
+    assert rollup_period_start(datetime.date(2023, 1, 2), "week") == datetime.date(2023, 1, 2)
+    assert rollup_period_start(sunday, "month") == sunday
+    assert rollup_period_start(datetime.date(2023, 2, 28), "month") == datetime.date(2023, 2, 1)
+
+
+def test_swap_shadow_table_renames_shadow_relations():
+    """Test that the swap drops the live table under a lock timeout and gives the shadow relations its names."""
+    conn = MagicMock()
+    cur = _cursor(conn)
+    cur.fetchall.return_value = [
+        ("trip_summary_shadow", "p"),
+        ("trip_summary_shadow_y2023m01", "r"),
+        ("trip_summary_shadow_y2023m01_pkey", "i"),
+    ]
+
+    swap_shadow_table(conn, 2000)
+
+    statements = [c.args for c in cur.execute.call_args_list]
+    assert statements[0] == ("SELECT set_config('lock_timeout', %s, true)", ("2000ms",))
+    assert statements[3] == ("DROP TABLE trip_summary",)
+    renames = [
+        (statement[0].seq[0].string, [part.strings for part in statement[0].seq if isinstance(part, sql.Identifier)])
+        for statement in statements[4:]
+    ]
+    assert renames == [
+        ("ALTER TABLE ", [("trip_summary_shadow",), ("trip_summary",)]),
+        ("ALTER TABLE ", [("trip_summary_shadow_y2023m01",), ("trip_summary_y2023m01",)]),
+        ("ALTER INDEX ", [("trip_summary_shadow_y2023m01_pkey",), ("trip_summary_y2023m01_pkey",)]),
+    ]
+    conn.commit.assert_not_called()
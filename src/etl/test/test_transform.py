@@ -1,12 +1,25 @@
 import os
+import uuid
+from datetime import date
 # Removed unused import
+import numpy as np
 import pandas as pd
 import pyarrow as pa
 import pytest
 from unittest.mock import MagicMock
-from src.etl.resources.transform_resource import ParquetTransformResource
+from src.etl.resources import transform_resource as transform_resource_module
+from src.etl.resources.transform_resource import (
+    SUMMARY_KEY_NAMESPACE,
+    ParquetTransformResource,
+    load_transform_manifest,
+    read_pickup_month,
+    summary_keys,
+)
+from src.etl.partitions import summary_dataset_files
+from src.etl.setting.setting import ROLLUPS
 from dagster import AssetExecutionContext
 
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 
 
@@ -81,8 +94,8 @@ def test_process_parquet_file(transform_resource, mock_context, sample_parquet_f
     # Call the method
     result = transform_resource.process_parquet_file(str(sample_parquet_file), mock_context)
 
-    # Verify the output file is created
-    output_file_name = f"summary_{os.path.basename(sample_parquet_file)}"
+    # Verify the output file is created in the month of its trips
+    output_file_name = os.path.join("daily", "year=2023", "month=01", "summary.parquet")
     output_file_path = os.path.join(transform_resource.output_folder, output_file_name)
     assert os.path.exists(output_file_path)
 
@@ -121,11 +134,302 @@ def test_transform_parquet_files(transform_resource, mock_context, sample_parque
     transform_resource.transform_parquet_files(mock_context)
 
     # Verify the output file is created
-    output_file_name = f"summary_{os.path.basename(sample_parquet_file)}"
-    output_file_path = os.path.join(transform_resource.output_folder, output_file_name)
-    assert os.path.exists(output_file_path)
+    assert summary_dataset_files(transform_resource.output_folder, "daily") == [
+        os.path.join(transform_resource.output_folder, "daily", "year=2023", "month=01", "summary.parquet")
+    ]
 
     # Verify log messages
     mock_context.log.info.assert_any_call(f"Found 1 Parquet files to process.")
     mock_context.log.info.assert_any_call(f"Successfully processed {os.path.basename(sample_parquet_file)}")
-    mock_context.log.info.assert_any_call(f"Transformation complete. Summaries saved in {transform_resource.output_folder}")
\ No newline at end of file
+    mock_context.log.info.assert_any_call(f"Transformation complete. Summaries saved in {transform_resource.output_folder}")
+
+
+def test_transform_parquet_files_partition(mock_context, tmp_path):
+    """Test that a monthly partition only transforms its own source file."""
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pd.to_datetime(["2023-01-01 10:00:00", "2023-02-01 10:00:00"]),
+        "passenger_count": [1, 2],
+        "trip_distance": [1.5, 2.5],
+        "fare_amount": [10.0, 20.0],
+    })
+    for month in ("01", "02"):
+        pq.write_table(pa.Table.from_pandas(df), tmp_path / f"yellow_tripdata_2023-{month}.parquet")
+    transform_resource = ParquetTransformResource(
+        source_folder=str(tmp_path),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+    )
+    os.makedirs(transform_resource.output_folder, exist_ok=True)
+
+    transform_resource.transform_parquet_files(mock_context, "2023-02")
+
+    assert summary_dataset_files(transform_resource.output_folder) == [
+        os.path.join(transform_resource.output_folder, "daily", "year=2023", "month=02", "summary.parquet")
+    ]
+    mock_context.log.info.assert_any_call("Found 1 Parquet files to process.")
+
+
+def test_read_pickup_month_projects_and_filters(tmp_path):
+    """Test that only the summary columns of in-month trips are read from the raw file."""
+    df = pd.DataFrame({
+        "VendorID": [1, 2, 1, 2],
+        "tpep_pickup_datetime": pd.to_datetime([
+            "2022-12-31 23:59:00", "2023-01-01 00:00:00", "2023-01-31 23:59:59", "2023-02-01 00:00:00",
+        ]),
+        "passenger_count": [1, 2, 3, 4],
+        "trip_distance": [1.0, 2.0, 3.0, 4.0],
+        "fare_amount": [10.0, 20.0, 30.0, 40.0],
+        "tip_amount": [1.0, 1.0, 1.0, 1.0],
+    })
+    file_path = tmp_path / "yellow_tripdata_2023-01.parquet"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), file_path, row_group_size=1)
+
+    table = read_pickup_month(str(file_path))
+
+    assert table.column_names == ["tpep_pickup_datetime", "passenger_count", "trip_distance", "fare_amount"]
+    assert table["passenger_count"].to_pylist() == [2, 3]
+
+
+@pytest.fixture
+def random_trip_file(tmp_path):
+    """Fixture to create a raw trip file with nulls and trips outside its month."""
+    rng = np.random.default_rng(42)
+    rows = 5000
+    pickups = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(-2 * 86400, 33 * 86400, rows), unit="s")
+    passenger_count = pd.array(rng.integers(0, 6, rows), dtype="Int64")
+    passenger_count[rng.random(rows) < 0.1] = pd.NA
+    payment_type = pd.array(rng.integers(1, 5, rows), dtype="Int64")
+    payment_type[rng.random(rows) < 0.05] = pd.NA
+    df = pd.DataFrame({
+        "VendorID": rng.integers(1, 3, rows),
+        "RatecodeID": rng.integers(1, 7, rows),
+        "payment_type": payment_type,
+        "tpep_pickup_datetime": pickups,
+        "passenger_count": passenger_count,
+        "trip_distance": rng.gamma(2.0, 2.0, rows),
+        "fare_amount": rng.gamma(2.0, 8.0, rows),
+    })
+    file_path = tmp_path / "yellow_tripdata_2023-01.parquet"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), file_path, row_group_size=1000)
+    return file_path
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "streaming", "duckdb"])
+def test_summary_engine_parity(engine, mock_context, random_trip_file, tmp_path, monkeypatch):
+    """Test that every summary engine writes the same schema and values as the pandas engine, for every rollup."""
+    if engine == "duckdb":
+        pytest.importorskip("duckdb")
+    # Fold streaming partials often so merging partial aggregates is exercised too
+    monkeypatch.setattr(transform_resource_module, "PARTIALS_PER_MERGE", 4)
+    outputs = {}
+    for name in ("pandas", engine):
+        transform_resource = ParquetTransformResource(
+            source_folder=str(tmp_path),
+            output_folder=str(tmp_path / name),
+            max_workers=1,
+            engine=name,
+            batch_size=256,
+            rollups=ROLLUPS,
+        )
+        os.makedirs(transform_resource.output_folder, exist_ok=True)
+        transform_resource.process_parquet_file(str(random_trip_file), mock_context)
+        outputs[name] = {
+            grain: pq.read_table(summary_dataset_files(transform_resource.output_folder, grain, "2023-01")[0])
+            for grain in ["daily", *ROLLUPS]
+        }
+
+    assert outputs["pandas"]["daily"].num_rows == 31
+    # Null payment types form their own group
+    assert outputs["pandas"]["payment_type"]["payment_type"].null_count > 0
+    for grain, expected in outputs["pandas"].items():
+        actual = outputs[engine][grain]
+        assert actual.schema.remove_metadata() == expected.schema.remove_metadata()
+        pd.testing.assert_frame_equal(
+            actual.to_pandas(),
+            expected.to_pandas(),
+            check_exact=False,
+            rtol=1e-9,
+        )
+
+
+def test_summary_keys_are_deterministic(mock_context, random_trip_file, tmp_path):
+    """Test that re-transforming a file reproduces its keys and that keys are unique across grains."""
+    transform_resource = ParquetTransformResource(
+        source_folder=str(tmp_path),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+        rollups=ROLLUPS,
+    )
+    os.makedirs(transform_resource.output_folder, exist_ok=True)
+    read_keys = lambda: {
+        grain: pq.read_table(summary_dataset_files(transform_resource.output_folder, grain, "2023-01")[0])["uuid"].to_pylist()
+        for grain in ["daily", *ROLLUPS]
+    }
+
+    transform_resource.process_parquet_file(str(random_trip_file), mock_context)
+    first_run = read_keys()
+    transform_resource.process_parquet_file(str(random_trip_file), mock_context)
+
+    assert read_keys() == first_run
+    all_keys = [key for keys in first_run.values() for key in keys]
+    assert len(set(all_keys)) == len(all_keys)
+    assert all(uuid.UUID(key).version == 5 for key in all_keys)
+
+
+def test_summary_keys_match_uuid5():
+    """Test that the vectorized keys are exactly the uuid5 of each natural key, nulls as empty values."""
+    summary = pa.table({
+        "pickup_date": pa.array([date(2023, 1, 1), date(2023, 1, 2)], pa.date32()),
+        "VendorID": pa.array([1, None], pa.int64()),
+    })
+
+    keys = summary_keys(summary, "yellow_tripdata", "vendor").to_pylist()
+
+    assert keys == [
+        str(uuid.uuid5(SUMMARY_KEY_NAMESPACE, "yellow_tripdata|vendor|2023-01-01|1")),
+        str(uuid.uuid5(SUMMARY_KEY_NAMESPACE, "yellow_tripdata|vendor|2023-01-02|")),
+    ]
+
+
+def test_unknown_rollup(mock_context, sample_parquet_file, tmp_path):
+    """Test that an unknown rollup grain is rejected."""
+    transform_resource = ParquetTransformResource(
+        source_folder=str(tmp_path),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+        rollups=["weekly"],
+    )
+    with pytest.raises(ValueError, match=r"Unknown rollup grains \['weekly'\]"):
+        transform_resource.process_parquet_file(str(sample_parquet_file), mock_context)
+
+
+def test_unknown_engine(mock_context, sample_parquet_file, tmp_path):
+    """Test that an unknown engine is rejected."""
+    transform_resource = ParquetTransformResource(
+        source_folder=str(tmp_path),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+        engine="spark",
+    )
+    with pytest.raises(ValueError, match="Unknown transform engine 'spark'"):
+        transform_resource.process_parquet_file(str(sample_parquet_file), mock_context)
+
+
+def test_transform_parquet_files_parallel(mock_context, tmp_path):
+    """Test that parallel mode summarizes files in worker processes and reports a bad file without failing the rest."""
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pd.to_datetime(["2023-01-01 10:00:00", "2023-01-02 10:00:00"]),
+        "passenger_count": [1, 2],
+        "trip_distance": [1.5, 2.5],
+        "fare_amount": [10.0, 20.0],
+    })
+    for month in ("01", "02"):
+        pq.write_table(pa.Table.from_pandas(df), tmp_path / f"yellow_tripdata_2023-{month}.parquet")
+    (tmp_path / "yellow_tripdata_2023-03.parquet").write_bytes(b"not a parquet file")
+    transform_resource = ParquetTransformResource(
+        source_folder=str(tmp_path),
+        output_folder=str(tmp_path / "output"),
+        max_workers=2,
+        parallel=True,
+    )
+    os.makedirs(transform_resource.output_folder, exist_ok=True)
+
+    results = {os.path.basename(r.file_path): r for r in transform_resource.transform_parquet_files(mock_context)}
+
+    assert results["yellow_tripdata_2023-01.parquet"].rows == 2
+    assert results["yellow_tripdata_2023-02.parquet"].rows == 0
+    assert results["yellow_tripdata_2023-03.parquet"].error.startswith("ArrowInvalid")
+    assert summary_dataset_files(transform_resource.output_folder) == [
+        os.path.join(transform_resource.output_folder, "daily", "year=2023", "month=01", "summary.parquet"),
+        os.path.join(transform_resource.output_folder, "daily", "year=2023", "month=02", "summary.parquet"),
+    ]
+    mock_context.log.info.assert_any_call("Successfully processed yellow_tripdata_2023-01.parquet")
+    mock_context.log.error.assert_any_call("1 of 3 files failed to transform.")
+
+
+def test_transform_parquet_files_incremental(mock_context, tmp_path):
+    """Test that only new or changed source files are re-summarized and orphaned summaries are removed."""
+    source_folder = tmp_path / "source"
+    source_folder.mkdir()
+    df = pd.DataFrame({
+        "tpep_pickup_datetime": pd.to_datetime(["2023-01-01 10:00:00", "2023-01-02 10:00:00"]),
+        "passenger_count": [1, 2],
+        "trip_distance": [1.5, 2.5],
+        "fare_amount": [10.0, 20.0],
+    })
+    for month in ("01", "02"):
+        pq.write_table(pa.Table.from_pandas(df), source_folder / f"yellow_tripdata_2023-{month}.parquet")
+    transform_resource = ParquetTransformResource(
+        source_folder=str(source_folder),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+    )
+    os.makedirs(transform_resource.output_folder, exist_ok=True)
+    transform_resource.transform_parquet_files(mock_context)
+
+    # Unchanged files are skipped, a rewritten one is summarized again
+    pq.write_table(pa.Table.from_pandas(df.iloc[:1]), source_folder / "yellow_tripdata_2023-02.parquet")
+    results = {os.path.basename(r.file_path): r for r in transform_resource.transform_parquet_files(mock_context)}
+    assert results["yellow_tripdata_2023-01.parquet"].skipped
+    assert results["yellow_tripdata_2023-01.parquet"].rows == 2
+    assert not results["yellow_tripdata_2023-02.parquet"].skipped
+    mock_context.log.info.assert_any_call("Skipping 1 unchanged files, 1 to transform.")
+
+    # A new grain changes the config version, so every file is summarized again
+    transform_resource = ParquetTransformResource(
+        source_folder=str(source_folder),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+        rollups=["hourly"],
+    )
+    results = transform_resource.transform_parquet_files(mock_context)
+    assert not any(result.skipped for result in results)
+
+    # Summaries of a deleted source file are removed with its manifest entry
+    (source_folder / "yellow_tripdata_2023-01.parquet").unlink()
+    transform_resource.transform_parquet_files(mock_context)
+    assert summary_dataset_files(transform_resource.output_folder) == [
+        os.path.join(transform_resource.output_folder, "daily", "year=2023", "month=02", "summary.parquet"),
+        os.path.join(transform_resource.output_folder, "hourly", "year=2023", "month=02", "summary.parquet"),
+    ]
+    assert list(load_transform_manifest(transform_resource.output_folder)["files"]) == ["yellow_tripdata_2023-02.parquet"]
+
+
+def test_summaries_are_compacted_per_month(mock_context, tmp_path):
+    """Test that the summaries of several datasets of a month end up in one zstd file sorted by pickup date."""
+    source_folder = tmp_path / "source"
+    source_folder.mkdir()
+    for dataset, days in (("yellow_tripdata", ["2023-01-03", "2023-01-01"]), ("green_tripdata", ["2023-01-02"])):
+        df = pd.DataFrame({
+            "tpep_pickup_datetime": pd.to_datetime(days),
+            "passenger_count": [1] * len(days),
+            "trip_distance": [1.5] * len(days),
+            "fare_amount": [10.0] * len(days),
+        })
+        pq.write_table(pa.Table.from_pandas(df), source_folder / f"{dataset}_2023-01.parquet")
+    transform_resource = ParquetTransformResource(
+        source_folder=str(source_folder),
+        output_folder=str(tmp_path / "output"),
+        max_workers=1,
+    )
+    os.makedirs(transform_resource.output_folder, exist_ok=True)
+
+    transform_resource.transform_parquet_files(mock_context, "2023-01")
+
+    [dataset_file] = summary_dataset_files(transform_resource.output_folder, "daily", "2023-01")
+    summary = pq.read_table(dataset_file)
+    assert [day.isoformat() for day in summary["pickup_date"].to_pylist()] == ["2023-01-01", "2023-01-02", "2023-01-03"]
+    column = pq.ParquetFile(dataset_file).metadata.row_group(0).column(1)
+    assert column.compression == "ZSTD"
+    assert column.statistics.has_min_max
+
+    # Hive partitions are discovered when the staging folder is read as a dataset
+    daily = ds.dataset(os.path.join(transform_resource.output_folder, "daily"), format="parquet", partitioning="hive")
+    assert daily.to_table(filter=(ds.field("year") == 2023) & (ds.field("month") == 1)).num_rows == 3
+    assert transform_resource.read_summary("2023-01").equals(summary)
+    assert transform_resource.read_summary("2023-02").num_rows == 0
+
+    # A full rebuild from the fragments gives the same file
+    os.remove(dataset_file)
+    assert transform_resource.compact_summaries(mock_context) == [dataset_file]
+    assert pq.read_table(dataset_file).equals(summary)
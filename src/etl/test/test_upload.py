@@ -0,0 +1,120 @@
+import os
+import boto3
+import pytest
+from unittest.mock import MagicMock, patch
+from moto import mock_aws
+from dagster import AssetExecutionContext
+from src.etl.resources.upload_resource import ParquetUploadResource
+
+
+@pytest.fixture
+def mock_context():
+    """Fixture for mocking the Dagster AssetExecutionContext."""
+    context = MagicMock(spec=AssetExecutionContext)
+    context.log.info = MagicMock()
+    context.log.error = MagicMock()
+    return context
+
+
+@pytest.fixture
+def s3():
+    """Fixture for a moto S3 stand-in with an empty bucket."""
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket="test-bucket")
+        yield client
+
+
+@pytest.fixture
+def source_folder(tmp_path):
+    """Fixture for a staging folder with two small summaries and one file large enough for multipart."""
+    for grain in ("daily", "hourly"):
+        os.makedirs(tmp_path / grain / "year=2023" / "month=01")
+        (tmp_path / grain / "year=2023" / "month=01" / "summary.parquet").write_bytes(b"PAR1" * 16)
+    (tmp_path / "large.parquet").write_bytes(os.urandom(6 * 1024 * 1024))
+    return tmp_path
+
+
+def make_resource(source_folder, **kwargs):
+    return ParquetUploadResource(
+        source_folder=str(source_folder),
+        bucket_name="test-bucket",
+        s3_folder="summaries",
+        aws_access_key="test",
+        aws_secret_key="test",
+        region_name="us-east-1",
+        batch_size=4,
+        multipart_threshold=5 * 1024 * 1024,
+        multipart_chunksize=5 * 1024 * 1024,
+        backoff_factor=0,
+        **kwargs,
+    )
+
+
+FILES = ["daily/year=2023/month=01/summary.parquet", "hourly/year=2023/month=01/summary.parquet", "large.parquet"]
+
+
+def test_upload_files(s3, source_folder, mock_context):
+    """Test that files are uploaded concurrently under their relative keys, large ones in parts."""
+    summary = make_resource(source_folder).upload_files(mock_context, FILES)
+
+    assert sorted(summary.uploaded) == [f"summaries/{file_name}" for file_name in FILES]
+    assert summary.failed == {}
+    assert summary.bytes_uploaded == sum(os.path.getsize(source_folder / file_name) for file_name in FILES)
+    keys = sorted(obj["Key"] for obj in s3.list_objects_v2(Bucket="test-bucket")["Contents"])
+    assert keys == [f"summaries/{file_name}" for file_name in FILES]
+    # Multipart uploads have an ETag of the form "<md5 of part md5s>-<part count>"
+    assert s3.head_object(Bucket="test-bucket", Key="summaries/large.parquet")["ETag"].endswith('-2"')
+    assert summary.as_metadata()["files_uploaded"] == 3
+
+
+def test_upload_files_reports_failures(s3, source_folder, mock_context):
+    """Test that a missing bucket is retried and reported per file instead of raising."""
+    resource = make_resource(source_folder, max_retries=2)
+    resource = ParquetUploadResource(**{**resource.model_dump(), "bucket_name": "missing-bucket"})
+
+    summary = resource.upload_files(mock_context, FILES[:1])
+
+    assert summary.uploaded == []
+    assert list(summary.failed) == ["summaries/daily/year=2023/month=01/summary.parquet"]
+    assert sum("Retrying" in call.args[0] for call in mock_context.log.info.call_args_list) == 2
+
+
+def test_upload_files_missing_file_is_not_retried(s3, source_folder, mock_context):
+    """Test that a missing local file fails immediately."""
+    summary = make_resource(source_folder).upload_files(mock_context, ["missing.parquet"])
+
+    assert summary.failed["summaries/missing.parquet"].startswith("FileNotFoundError")
+    assert not any("Retrying" in call.args[0] for call in mock_context.log.info.call_args_list)
+
+
+def test_upload_files_retries_transient_errors(source_folder, mock_context):
+    """Test that a file is uploaded once a transient error goes away."""
+    s3_client = MagicMock()
+    s3_client.upload_file.side_effect = [ConnectionError("reset by peer"), None]
+
+    with patch.object(ParquetUploadResource, "create_s3_client", return_value=s3_client):
+        summary = make_resource(source_folder).upload_files(mock_context, ["large.parquet"])
+
+    assert summary.uploaded == ["summaries/large.parquet"]
+    assert s3_client.upload_file.call_count == 2
+
+
+def test_upload_files_skips_unchanged_objects(s3, source_folder, mock_context):
+    """Test that only new or changed files are uploaded again, multipart ones included."""
+    resource = make_resource(source_folder)
+    resource.upload_files(mock_context, FILES)
+
+    (source_folder / "daily" / "year=2023" / "month=01" / "summary.parquet").write_bytes(b"PAR2" * 16)
+    with patch.object(s3.__class__, "head_object") as head_object:
+        summary = resource.upload_files(mock_context, FILES)
+
+    assert summary.uploaded == ["summaries/daily/year=2023/month=01/summary.parquet"]
+    assert sorted(summary.skipped) == ["summaries/hourly/year=2023/month=01/summary.parquet", "summaries/large.parquet"]
+    assert summary.bytes_uploaded == 64
+    assert summary.bytes_skipped == 64 + 6 * 1024 * 1024
+    # One listing of the prefix instead of a HEAD request per file
+    head_object.assert_not_called()
+
+    summary = ParquetUploadResource(**{**resource.model_dump(), "skip_unchanged": False}).upload_files(mock_context, FILES)
+    assert len(summary.uploaded) == 3
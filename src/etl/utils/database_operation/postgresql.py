@@ -1,55 +1,185 @@
-
-import os,sys
+import io
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
 import pandas as pd
-sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
-from logger.logger_config import get_logger
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+from src.etl.utils.database_operation.schema import ensure_month_partitions, migrate, month_partition_name
+
+logger = logging.getLogger(__name__)
+
+# Columns of trip_summary written by loads, in insert order, with their types
+LOAD_COLUMN_TYPES = {
+    "uuid": "text",
+    "pickup_date": "date",
+    "total_passenger_count": "bigint",
+    "total_distance": "double precision",
+    "total_fare": "double precision",
+    "avg_trip_distance": "double precision",
+    "avg_fare_amount": "double precision",
+    "distance_count": "bigint",
+    "fare_count": "bigint",
+}
+LOAD_COLUMNS = list(LOAD_COLUMN_TYPES)
+
+# Summaries written before the counts were added lack them; they load as NULL
+OPTIONAL_LOAD_COLUMNS = ("distance_count", "fare_count")
+
+# Columns that identify a row; every other column is compared before a row is rewritten
+KEY_COLUMNS = ["uuid", "pickup_date"]
+VALUE_COLUMNS = [column for column in LOAD_COLUMNS if column not in KEY_COLUMNS]
+
+
+def values_differ(stored: str, source: str) -> str:
+    """Condition that is true when a ``stored`` row has other ``VALUE_COLUMNS`` than ``source``."""
+    return (
+        f"({', '.join(f'{stored}.{column}' for column in VALUE_COLUMNS)})"
+        f" IS DISTINCT FROM ({', '.join(f'{source}.{column}' for column in VALUE_COLUMNS)})"
+    )
+
+
+def upsert_query(source: str, table: str = "trip_summary") -> str:
+    """
+    Upsert of the rows of ``source``, a query returning ``LOAD_COLUMNS``, into ``table``,
+    trip_summary or one of its month partitions.
+
+    Rows are compared with the stored ones first and only new or changed rows reach the
+    ``INSERT``, so re-loading identical data creates no dead tuples, row locks, WAL or index
+    entries. ``ON CONFLICT`` repeats the comparison for rows written concurrently. The
+    statement returns one row: the number of source rows, how many of them already existed
+    and how many were written, see ``UpsertCounts.from_merge``.
+    """
+    return f"""
+        WITH source AS ({source}),
+        matched AS (
+            SELECT source.*, stored.uuid IS NOT NULL AS existed,
+                stored.uuid IS NULL OR {values_differ("stored", "source")} AS changed
+            FROM source LEFT JOIN {table} AS stored USING ({", ".join(KEY_COLUMNS)})
+        ),
+        written AS (
+            INSERT INTO {table} AS trip_summary ({", ".join(LOAD_COLUMNS)})
+            SELECT {", ".join(LOAD_COLUMNS)} FROM matched WHERE changed
+            ON CONFLICT ({", ".join(KEY_COLUMNS)}) DO UPDATE SET
+                {", ".join(f"{column} = EXCLUDED.{column}" for column in VALUE_COLUMNS)}
+            WHERE {values_differ("trip_summary", "EXCLUDED")}
+            RETURNING 1
+        )
+        SELECT count(*), count(*) FILTER (WHERE existed), (SELECT count(*) FROM written) FROM matched
+    """
+
+
+@lru_cache(maxsize=None)
+def upsert_row_query(partition: str) -> str:
+    """
+    ``upsert_query`` of a single row of parameters into ``partition``, the month partition of
+    trip_summary holding it, so both load modes compare and count rows the same way.
+    Targeting the partition saves planning the other partitions for every row.
+    """
+    # Casts give the parameters the column types trip_summary expects
+    values = ", ".join(f"%s::{column_type}" for column_type in LOAD_COLUMN_TYPES.values())
+    return upsert_query(f"SELECT * FROM (VALUES ({values})) AS source ({', '.join(LOAD_COLUMNS)})", partition)
+
+
+MERGE_STAGING_QUERY = upsert_query(f"SELECT {', '.join(LOAD_COLUMNS)} FROM trip_summary_staging")
+
+
+def with_optional_columns(summary: pa.Table) -> pa.Table:
+    """``summary`` with NULL columns for the ``OPTIONAL_LOAD_COLUMNS`` it lacks."""
+    for column in OPTIONAL_LOAD_COLUMNS:
+        if column not in summary.column_names:
+            summary = summary.append_column(column, pa.nulls(summary.num_rows, pa.int64()))
+    return summary
 
-logger = get_logger(__name__)
 
+@dataclass
+class UpsertCounts:
+    """Rows of an upsert that were inserted, rewritten with new values or left as they were."""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
 
-# Function to create the table if it does not exist
+    @classmethod
+    def from_merge(cls, rows: int, existing: int, written: int) -> "UpsertCounts":
+        """Counts from the ``(rows, existing, written)`` result of an ``upsert_query``."""
+        rows, existing, written = int(rows), int(existing), int(written)
+        inserted = rows - existing
+        return cls(inserted=inserted, updated=written - inserted, unchanged=rows - written)
+
+    def __add__(self, other: "UpsertCounts") -> "UpsertCounts":
+        return UpsertCounts(self.inserted + other.inserted, self.updated + other.updated, self.unchanged + other.unchanged)
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+
+def upsert_rows(conn, df: pd.DataFrame) -> UpsertCounts:
+    """Upserts the rows of a daily summary frame into trip_summary one by one; the caller commits."""
+    counts = UpsertCounts()
+    df["pickup_date"] = pd.to_datetime(df["pickup_date"]).dt.date
+    with conn.cursor() as cur:
+        for _, row in df.iterrows():
+            pickup_date = row["pickup_date"]
+            query = upsert_row_query(month_partition_name(pickup_date.year, pickup_date.month))
+            cur.execute(query, tuple(row[column] for column in LOAD_COLUMNS))
+            counts += UpsertCounts.from_merge(*cur.fetchone())
+    return counts
+
+
+def copy_rows(conn, table: str, summary: pa.Table):
+    """
+    Streams the ``LOAD_COLUMNS`` of a daily summary into ``table`` with ``COPY FROM STDIN``;
+    the caller commits. Arrow writes the CSV in one vectorized pass.
+    """
+    pickup_date = pc.cast(summary["pickup_date"], pa.date32())
+    summary = summary.select(LOAD_COLUMNS).set_column(1, "pickup_date", pickup_date)
+    buffer = io.BytesIO()
+    pacsv.write_csv(summary, buffer, write_options=pacsv.WriteOptions(include_header=False))
+    buffer.seek(0)
+    with conn.cursor() as cur:
+        cur.copy_expert(f"COPY {table} ({', '.join(LOAD_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+
+def copy_upsert(conn, summary: pa.Table) -> UpsertCounts:
+    """
+    Bulk-upserts a daily summary into trip_summary; the caller commits.
+
+    The rows are streamed with ``COPY`` into a temporary staging table and merged with a
+    single set-based upsert, so the number of round trips does not depend on the number
+    of rows.
+    """
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE trip_summary_staging (LIKE trip_summary INCLUDING DEFAULTS) ON COMMIT DROP")
+    copy_rows(conn, "trip_summary_staging", summary)
+    with conn.cursor() as cur:
+        cur.execute(MERGE_STAGING_QUERY)
+        rows, existing, written = cur.fetchone()
+    return UpsertCounts.from_merge(rows, existing, written)
+
+
+# Function to create the table if it does not exist, or migrate it to the current schema
 def create_table_if_not_exists(conn):
     try:
-        create_table_query = '''
-        CREATE TABLE IF NOT EXISTS trip_summary (
-            uuid TEXT PRIMARY KEY,
-            pickup_date DATE,
-            total_passenger_count INTEGER,
-            total_distance FLOAT,
-            total_fare FLOAT,
-            avg_trip_distance FLOAT,
-            avg_fare_amount FLOAT
-        );
-        '''
-        cursor = conn.cursor()
-        cursor.execute(create_table_query)
-        conn.commit()
-        cursor.close()
-    except KeyError as e:
-        logger.error(f"Can not create table. Error: ".format(e))
+        migrate(conn)
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Can not create table. Error: {e}")
 
-# Function to read data from a Parquet file and insert it into the database
-def read_and_write_to_db(parquet_file_path, conn):
+# Function to read data from a Parquet file and upsert it into trip_summary
+def read_and_write_to_db(parquet_file_path, conn) -> UpsertCounts | None:
     try:
-        df = pd.read_parquet(parquet_file_path)
-        insert_query = '''
-        INSERT INTO parquet_data (uuid, pickup_date, total_passenger_count, total_distance, total_fare, avg_trip_distance, avg_fare_amount)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (uuid) DO NOTHING;
-        '''
-        cursor = conn.cursor()
-        for _, row in df.iterrows():
-            cursor.execute(insert_query, (
-                row['uuid'],
-                row['pickup_date'],
-                row['total_passenger_count'],
-                row['total_distance'],
-                row['total_fare'],
-                row['avg_trip_distance'],
-                row['avg_fare_amount']
-            ))
+        summary = with_optional_columns(pa.Table.from_pandas(pd.read_parquet(parquet_file_path), preserve_index=False))
+        pickup_dates = pc.unique(pc.cast(summary["pickup_date"], pa.date32())).to_pylist()
+        ensure_month_partitions(conn, {(day.year, day.month) for day in pickup_dates if day})
+        counts = copy_upsert(conn, summary)
         conn.commit()
-        cursor.close()
-        logger.info(f"Data from {parquet_file_path} has been written to the database.")
+        logger.info(
+            f"Data from {parquet_file_path} has been written to the database: {counts.inserted} inserted, "
+            f"{counts.updated} updated, {counts.unchanged} unchanged."
+        )
+        return counts
     except Exception as e:
+        conn.rollback()
         logger.error(f"Failed to write data from {parquet_file_path}: {e}")
\ No newline at end of file
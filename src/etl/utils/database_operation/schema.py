@@ -0,0 +1,341 @@
+"""
+Schema of the trip summary database, created and migrated by the ETL loader.
+
+``trip_summary`` is range-partitioned by month on ``pickup_date``: one partition per month,
+created on demand as months are loaded, so date lookups and range scans only touch the
+partitions they need. A covering index on ``pickup_date`` includes every other column and
+keeps the lookups of the backend's ``/trips`` route index-only. Weekly and monthly rollup
+tables hold mergeable sums and counts of the daily rows. Full refreshes are loaded into
+``trip_summary_shadow`` and swapped in for the live table. The backend ORM in
+``backend/app/orm/models.py`` mirrors the column types declared here.
+"""
+import datetime
+import logging
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+TRIP_SUMMARY_DDL = """
+    CREATE TABLE trip_summary (
+        uuid TEXT NOT NULL,
+        pickup_date DATE NOT NULL,
+        total_passenger_count BIGINT,
+        total_distance DOUBLE PRECISION,
+        total_fare DOUBLE PRECISION,
+        avg_trip_distance DOUBLE PRECISION,
+        avg_fare_amount DOUBLE PRECISION,
+        PRIMARY KEY (uuid, pickup_date)
+    ) PARTITION BY RANGE (pickup_date)
+"""
+
+# Created on the parent, so every partition gets its own copy
+TRIP_SUMMARY_DATE_INDEX_DDL = """
+    CREATE INDEX {index} ON {table} (pickup_date)
+    INCLUDE (uuid, total_passenger_count, total_distance, total_fare, avg_trip_distance, avg_fare_amount)
+"""
+
+# Content hash of every summary file already loaded; written in the transaction of its rows
+LOAD_LEDGER_DDL = """
+    CREATE TABLE IF NOT EXISTS load_ledger (
+        file_path TEXT PRIMARY KEY,
+        sha256 TEXT NOT NULL,
+        row_count BIGINT NOT NULL,
+        loaded_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+# Rollup tables of trip_summary and the date_trunc unit of their periods
+ROLLUP_TABLES = {
+    "trip_summary_weekly": "week",
+    "trip_summary_monthly": "month",
+}
+
+# Averages are derived from the stored sums and counts, so any set of periods merges exactly
+ROLLUP_TABLE_DDL = """
+    CREATE TABLE {table} (
+        period_start DATE PRIMARY KEY,
+        days INTEGER NOT NULL,
+        total_passenger_count BIGINT,
+        total_distance DOUBLE PRECISION,
+        total_fare DOUBLE PRECISION,
+        distance_count BIGINT,
+        fare_count BIGINT,
+        avg_trip_distance DOUBLE PRECISION GENERATED ALWAYS AS (total_distance / NULLIF(distance_count, 0)) STORED,
+        avg_fare_amount DOUBLE PRECISION GENERATED ALWAYS AS (total_fare / NULLIF(fare_count, 0)) STORED,
+        refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+    )
+"""
+
+# Key of the transaction-level advisory lock that serializes schema changes of concurrent runs
+SCHEMA_LOCK_ID = 7340501
+
+# Key of the advisory lock held while a load refreshes the rollup periods it touched
+ROLLUP_LOCK_ID = 7340502
+
+# Key of the session advisory lock a full refresh holds from creating the shadow table to the swap
+REFRESH_LOCK_ID = 7340503
+
+# Full refreshes are bulk-loaded into this table, then swapped in for trip_summary
+SHADOW_TABLE = "trip_summary_shadow"
+
+# The shadow table, its partitions and the indexes of all of them
+SHADOW_RELATIONS_QUERY = """
+    WITH tables AS (SELECT relid FROM pg_partition_tree(%s::regclass))
+    SELECT relname, relkind FROM pg_class WHERE oid IN (SELECT relid FROM tables)
+    UNION ALL
+    SELECT relname, relkind FROM pg_class
+    WHERE oid IN (SELECT indexrelid FROM pg_index WHERE indrelid IN (SELECT relid FROM tables))
+"""
+
+
+def month_partition_name(year: int, month: int, table: str = "trip_summary") -> str:
+    """Name of the partition of a month of ``table``, e.g. ``trip_summary_y2023m01``."""
+    return f"{table}_y{year}m{month:02d}"
+
+
+def _create_month_partition(cur, year: int, month: int, table: str = "trip_summary"):
+    start = datetime.date(year, month, 1)
+    end = datetime.date(year + month // 12, month % 12 + 1, 1)
+    cur.execute(
+        sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM ({}) TO ({})").format(
+            sql.Identifier(month_partition_name(year, month, table)),
+            sql.Identifier(table),
+            sql.Literal(start.isoformat()),
+            sql.Literal(end.isoformat()),
+        )
+    )
+
+
+def _partition_trip_summary(cur):
+    """
+    Creates the partitioned ``trip_summary``. An existing unpartitioned table is renamed,
+    its rows are copied into partitions of their months and it is dropped; rows without a
+    ``pickup_date`` cannot be routed to a partition and are not carried over.
+    """
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('trip_summary')")
+    existing = cur.fetchone()
+    if existing and existing[0] == "p":
+        return
+    if existing:
+        cur.execute("ALTER TABLE trip_summary RENAME TO trip_summary_legacy")
+        cur.execute("ALTER INDEX IF EXISTS trip_summary_pkey RENAME TO trip_summary_legacy_pkey")
+    cur.execute(TRIP_SUMMARY_DDL)
+    cur.execute(_date_index_ddl("trip_summary"))
+    if not existing:
+        return
+    cur.execute(
+        """
+        SELECT DISTINCT extract(year FROM pickup_date)::int, extract(month FROM pickup_date)::int
+        FROM trip_summary_legacy WHERE pickup_date IS NOT NULL
+        """
+    )
+    for year, month in cur.fetchall():
+        _create_month_partition(cur, year, month)
+    cur.execute(
+        """
+        INSERT INTO trip_summary
+            (uuid, pickup_date, total_passenger_count, total_distance, total_fare, avg_trip_distance, avg_fare_amount)
+        SELECT uuid, pickup_date, total_passenger_count, total_distance, total_fare, avg_trip_distance, avg_fare_amount
+        FROM trip_summary_legacy WHERE pickup_date IS NOT NULL
+        """
+    )
+    logger.info(f"Migrated {cur.rowcount} rows of the unpartitioned trip_summary table.")
+    cur.execute("DROP TABLE trip_summary_legacy")
+
+
+def _date_index_ddl(table: str) -> sql.Composed:
+    return sql.SQL(TRIP_SUMMARY_DATE_INDEX_DDL).format(
+        index=sql.Identifier(f"{table}_pickup_date_idx"), table=sql.Identifier(table),
+    )
+
+
+def _create_load_ledger(cur):
+    cur.execute(LOAD_LEDGER_DDL)
+
+
+def _create_rollups(cur):
+    """
+    Adds the non-null counts behind the daily averages to ``trip_summary`` and creates the
+    rollup tables. Rows loaded before keep NULL counts and are left out of the rollups;
+    ``_quarantine_unstable_keys`` removes them.
+    """
+    cur.execute(
+        "ALTER TABLE trip_summary ADD COLUMN IF NOT EXISTS distance_count BIGINT, "
+        "ADD COLUMN IF NOT EXISTS fare_count BIGINT"
+    )
+    for table in ROLLUP_TABLES:
+        cur.execute(sql.SQL(ROLLUP_TABLE_DDL).format(table=sql.Identifier(table)))
+
+
+def _quarantine_unstable_keys(cur):
+    """
+    Moves every ``trip_summary`` row to ``trip_summary_quarantine`` and clears the load ledger.
+
+    Rows loaded so far are keyed by uuid4 or by a pandas hash that is not stable across
+    versions, so the summaries re-keyed with version 5 UUIDs would be inserted next to them
+    instead of updating them. The next load of each month writes it again under the stable
+    keys; the quarantined rows are only kept for inspection.
+    """
+    cur.execute("CREATE TABLE trip_summary_quarantine AS SELECT *, now() AS quarantined_at FROM trip_summary")
+    logger.info(f"Quarantined {cur.rowcount} trip_summary rows stored under unstable keys.")
+    cur.execute("TRUNCATE trip_summary")
+    cur.execute("DELETE FROM load_ledger")
+
+
+def _clear_rollups(cur):
+    """
+    Empties the rollup tables, which may hold periods aggregated over the quarantined rows
+    without counts. Loads fill them in again from the re-keyed rows.
+    """
+    for table in ROLLUP_TABLES:
+        cur.execute(sql.SQL("TRUNCATE {}").format(sql.Identifier(table)))
+
+
+def _version_load_ledger(cur):
+    """
+    Adds a ``version`` to the load ledger, drawn from its own sequence on every insert and
+    rewrite of an entry. ``count(*)`` and ``max(version)`` of the ledger then change with
+    every load, which ``loaded_at`` (the start of the loading transaction) cannot guarantee.
+    """
+    cur.execute("ALTER TABLE load_ledger ADD COLUMN version BIGSERIAL")
+
+
+# Applied in order, each at most once; append new migrations, never edit applied ones
+SCHEMA_MIGRATIONS = [
+    (1, "Month-partitioned trip_summary with a covering pickup_date index", _partition_trip_summary),
+    (2, "Load ledger of summary files", _create_load_ledger),
+    (3, "Weekly and monthly rollups of trip_summary", _create_rollups),
+    (4, "Quarantine trip_summary rows stored under unstable keys", _quarantine_unstable_keys),
+    (5, "Clear rollups aggregated over rows without counts", _clear_rollups),
+    (6, "Version the load ledger entries", _version_load_ledger),
+]
+
+
+def migrate(conn) -> list[int]:
+    """
+    Applies the pending ``SCHEMA_MIGRATIONS`` in one transaction and commits.
+
+    The versions applied so far are kept in ``schema_migrations``; an advisory lock makes
+    concurrent callers wait for each other instead of applying a migration twice.
+
+    Returns:
+        list[int]: Versions applied by this call.
+    """
+    applied = []
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+        cur.execute(SCHEMA_MIGRATIONS_DDL)
+        cur.execute("SELECT COALESCE(max(version), 0) FROM schema_migrations")
+        current = cur.fetchone()[0]
+        for version, description, apply in SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            apply(cur)
+            cur.execute("INSERT INTO schema_migrations (version, description) VALUES (%s, %s)", (version, description))
+            logger.info(f"Applied schema migration {version}: {description}")
+            applied.append(version)
+    conn.commit()
+    return applied
+
+
+def ensure_month_partitions(conn, months) -> list[str]:
+    """
+    Creates the ``trip_summary`` partitions of ``months`` that do not exist yet and commits.
+
+    Existing partitions are detected with one catalog lookup, so the common case takes no
+    lock on ``trip_summary``. Run it before the transactions that write the months' rows.
+
+    Args:
+        conn: psycopg2 connection.
+        months: ``(year, month)`` pairs.
+
+    Returns:
+        list[str]: Names of the partitions created.
+    """
+    partitions = {month_partition_name(year, month): (year, month) for year, month in months}
+    if not partitions:
+        return []
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT name FROM unnest(%s::text[]) AS name WHERE to_regclass(name) IS NULL",
+            (sorted(partitions),),
+        )
+        missing = sorted(name for (name,) in cur.fetchall())
+        if missing:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+            for name in missing:
+                _create_month_partition(cur, *partitions[name])
+    conn.commit()
+    return missing
+
+
+def rollup_period_start(day: datetime.date, unit: str) -> datetime.date:
+    """First day of the ``week`` (ISO, Monday) or ``month`` containing ``day``, as ``date_trunc`` computes it."""
+    if unit == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def create_shadow_table(conn, months):
+    """
+    Recreates an empty ``trip_summary_shadow`` with the columns of ``trip_summary`` and the
+    partitions of ``months``, and commits.
+
+    The shadow table has no primary key or indexes yet, so rows are bulk-loaded into it
+    without index maintenance; ``index_shadow_table`` builds them once it is filled.
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(SHADOW_TABLE)))
+        cur.execute(
+            sql.SQL("CREATE TABLE {} (LIKE trip_summary INCLUDING DEFAULTS) PARTITION BY RANGE (pickup_date)").format(
+                sql.Identifier(SHADOW_TABLE)
+            )
+        )
+        for year, month in sorted(months):
+            _create_month_partition(cur, year, month, SHADOW_TABLE)
+    conn.commit()
+
+
+def index_shadow_table(conn):
+    """
+    Builds the primary key and covering index of ``trip_summary`` on the loaded shadow table,
+    gathers its planner statistics and commits. Fails if a key was loaded twice.
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("ALTER TABLE {} ADD PRIMARY KEY (uuid, pickup_date)").format(sql.Identifier(SHADOW_TABLE)))
+        cur.execute(_date_index_ddl(SHADOW_TABLE))
+        cur.execute(sql.SQL("ANALYZE {}").format(sql.Identifier(SHADOW_TABLE)))
+    conn.commit()
+
+
+def swap_shadow_table(conn, lock_timeout_ms: int):
+    """
+    Replaces ``trip_summary`` with the indexed shadow table, without committing.
+
+    The live table is dropped and the shadow table, its partitions and their indexes take
+    over the live names, so readers see either all old rows or all new ones. The exclusive
+    lock is only held for these catalog changes; when a reader keeps ``trip_summary`` busy
+    for longer than ``lock_timeout_ms`` the swap fails instead of queueing all later
+    readers behind it.
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT set_config('lock_timeout', %s, true)", (f"{lock_timeout_ms}ms",))
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (SCHEMA_LOCK_ID,))
+        cur.execute(SHADOW_RELATIONS_QUERY, (SHADOW_TABLE,))
+        relations = cur.fetchall()
+        cur.execute("DROP TABLE trip_summary")
+        for name, kind in relations:
+            if not name.startswith(SHADOW_TABLE):
+                continue
+            statement = "ALTER INDEX {} RENAME TO {}" if kind in ("i", "I") else "ALTER TABLE {} RENAME TO {}"
+            cur.execute(
+                sql.SQL(statement).format(sql.Identifier(name), sql.Identifier("trip_summary" + name[len(SHADOW_TABLE):]))
+            )